@@ -1,79 +1,686 @@
+import os
 import re
 import sys
+import io
+import csv
+import gzip
 import json
-from typing import Optional, Dict, Tuple
+import socket
+import hashlib
+import time
+import sqlite3
+import threading
+import zlib
+import multiprocessing
+import multiprocessing.util
+import argparse
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cached_property, lru_cache, partial
+from decimal import Decimal
+from itertools import chain, islice
+from typing import Optional, Dict, Tuple, List, Iterable, Iterator, Callable, NamedTuple
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+import lxml.html
+import soupsieve
+from lxml import etree
+from urllib.parse import urljoin, urlparse
 
 # ==============================
 # 1) HTTP: download HTML (use bytes)
 # ==============================
-def fetch_html(url: str) -> bytes:
-    headers = {
-        "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36")
-    }
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                   "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+}
+
+def build_session(pool_size: int = 10) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.headers["Connection"] = "keep-alive"
+    # One adapter for both schemes; pool_block keeps sockets instead of discarding overflow
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class HttpCache:
+    """On-disk conditional-GET cache: body + ETag/Last-Modified per URL."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.revalidated = 0
+        self.downloaded = 0
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key[:2], key)
+
+    def validators(self, url: str) -> Dict[str, str]:
+        try:
+            with open(self._path(url) + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load(self, url: str) -> Optional[bytes]:
+        try:
+            with open(self._path(url) + ".body", "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self.revalidated += 1
+        return body
 
-    res = requests.get(url, headers=headers, timeout=20)
+    def forget(self, url: str) -> None:
+        try:
+            os.remove(self._path(url) + ".json")
+        except FileNotFoundError:
+            pass
+
+    def store(self, url: str, res: requests.Response) -> None:
+        with self._lock:
+            self.downloaded += 1
+        etag = res.headers.get("ETag")
+        last_modified = res.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Body first, then metadata: validators never point at a missing/partial body
+        _write_atomic(path + ".body", res.content)
+        meta = {"url": url, "etag": etag, "last_modified": last_modified}
+        _write_atomic(path + ".json", json.dumps(meta).encode("utf-8"))
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def fetch_html(url: str, session: Optional[requests.Session] = None,
+               cache: Optional[HttpCache] = None) -> bytes:
+    http = session if session is not None else requests
+    headers = {} if session is not None else dict(HEADERS)
+    if cache:
+        headers.update(cache.validators(url))
+
+    res = http.get(url, headers=headers, timeout=20)
+    if res.status_code == 304 and cache:
+        body = cache.load(url)
+        if body is not None:
+            return body
+        # Validators without a body (cache pruned by hand): drop them and refetch unconditionally,
+        # caching the fresh response so later runs revalidate with a single request again
+        cache.forget(url)
+        return fetch_html(url, session, cache)
     res.raise_for_status()
+    if cache:
+        cache.store(url, res)
 
     return res.content
 
+def connection_stats(session: requests.Session) -> Dict[str, int]:
+    num_requests = num_connections = 0
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            num_requests += pool.num_requests
+            num_connections += pool.num_connections
+    return {
+        "requests": num_requests,
+        "connections": num_connections,
+        "reused": max(num_requests - num_connections, 0),
+    }
+
 # ==============================
 # 2) Helpers
 # ==============================
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_fast_json = orjson is not None
+
+def set_fast_json(enabled: bool) -> None:
+    """Serialize/parse through orjson when it is installed (the default), or force the stdlib json module."""
+    global _fast_json
+    _fast_json = enabled and orjson is not None
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """UTF-8 JSON with non-ASCII kept as is: compact, or indented like json.dumps(indent=2)."""
+    if _fast_json:
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=json_default).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+def json_loads(data):
+    if _fast_json:
+        if type(data) is not str and isinstance(data, str):
+            data = str(data)  # orjson only accepts exact str; bs4 hands out NavigableString/Script subclasses
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # NaN, ints beyond 64 bits and the like: leave it to the stdlib
+    return json.loads(data)
+
+# Compiled once at import; the extractors run these on every page
+RE_CSV_ID = re.compile(r"/rent/(\d+)/(\d+)")
+RE_DIGITS = re.compile(r"\d+")
+RE_POSTCODE = re.compile(r"\b(\d{3}-\d{4})\b")
+RE_ADDRESS_LINE = re.compile(r"(\d{3}-\d{4}[^\n]{0,200})")
+RE_ADDRESS_END = re.compile(r"(TEL|Fax|FAX|電話)")
+RE_LEADING_POSTCODE = re.compile(r"^\s*\d{3}-\d{4}\s*")
+RE_PREFECTURE = re.compile(r"(.+?[都道府県])")
+RE_CITY = re.compile(r"(.+?(市|区|郡|町|村))")
+RE_YEAR = re.compile(r"(\d{4})年")
+RE_LATIN = re.compile(r"[A-Za-z]")
+RE_TITLE_SEP = re.compile(r"[｜|\\|]")
+RE_LINE_STATION = (re.compile(r"(.+?)／(.+?駅)"), re.compile(r"(.+?)/(.+?駅)"))
+RE_WALK = re.compile(r"徒歩\s*(\d+)\s*分")
+
 def extract_property_csv_id(url: str) -> Optional[str]:
-    m = re.search(r"/rent/(\d+)/(\d+)", url)
+    m = RE_CSV_ID.search(url)
 
     if m:
         return f"{m.group(1)}_{m.group(2)}"
-    nums = re.findall(r"\d+", url)
+    nums = RE_DIGITS.findall(url)
 
     return "_".join(nums) if nums else None
 
-def extract_postcode(soup: BeautifulSoup) -> Optional[str]:
-    candidates = [
-        '[itemprop="address"]', ".address", ".addr", ".p-address",
-        ".detailAddress", "#address", ".l-property__address",
-        ".c-detailAddress", ".p-detail__address"
-    ]
+def extract_building_id(url: str) -> Optional[str]:
+    m = RE_CSV_ID.search(url)
+    return m.group(1) if m else None
+
+def _has_class(name: str) -> str:
+    return f"[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+
+# Every CSS selector the extractors use, with its XPath twin for the lxml backend.
+# XPaths are relative (".//") so the same entry works on the document root or on a node.
+XPATH_BY_CSS: Dict[str, str] = {
+    "dl.rent_view_side_info": ".//dl" + _has_class("rent_view_side_info"),
+    "dt, dd": ".//dt | .//dd",
+    "dt": ".//dt",
+    "li": ".//li",
+    "img": ".//img",
+    "h1": ".//h1",
+    "h2": ".//h2",
+    ".rent_view_ttl": ".//*" + _has_class("rent_view_ttl"),
+    "title": ".//title",
+    'script[type="application/ld+json"]': './/script[@type="application/ld+json"]',
+    ".latitude": ".//*" + _has_class("latitude"),
+    ".longitude": ".//*" + _has_class("longitude"),
+    '[itemprop="address"]': './/*[@itemprop="address"]',
+    ".address": ".//*" + _has_class("address"),
+    ".addr": ".//*" + _has_class("addr"),
+    ".p-address": ".//*" + _has_class("p-address"),
+    ".detailAddress": ".//*" + _has_class("detailAddress"),
+    "#address": './/*[@id="address"]',
+    ".l-property__address": ".//*" + _has_class("l-property__address"),
+    ".c-detailAddress": ".//*" + _has_class("c-detailAddress"),
+    ".p-detail__address": ".//*" + _has_class("p-detail__address"),
+}
+
+# Compiled once per backend: soupsieve patterns for BeautifulSoup, XPath objects for lxml
+_SOUP_SELECTORS = {css: soupsieve.compile(css) for css in XPATH_BY_CSS}
+_XPATHS = {css: etree.XPath(xp) for css, xp in XPATH_BY_CSS.items()}
+
+# Selector groups searched in one traversal (see ParseContext.first_each), compiled on first use
+@lru_cache(maxsize=None)
+def _soup_group(selectors: Tuple[str, ...]):
+    return soupsieve.compile(", ".join(selectors)), [_SOUP_SELECTORS[css] for css in selectors]
+
+@lru_cache(maxsize=None)
+def _xpath_group(selectors: Tuple[str, ...]):
+    # Every grouped XPath is ".//*[predicate]": OR the predicates into a single descendant scan
+    preds = [XPATH_BY_CSS[css][len(".//*"):] for css in selectors]
+    assert all(XPATH_BY_CSS[css].startswith(".//*[") for css in selectors), selectors
+    combined = etree.XPath(".//*[" + " or ".join(f"({p[1:-1]})" for p in preds) + "]")
+    return combined, [etree.XPath("boolean(self::*" + p + ")") for p in preds]
+
+def _first_each(matches, members, is_match) -> list:
+    found = [None] * len(members)
+    missing = len(members)
+    for el in matches:
+        for i, member in enumerate(members):
+            if found[i] is None and is_match(member, el):
+                found[i] = el
+                missing -= 1
+        if not missing:
+            break
+    return found
+
+class ParseContext(ABC):
+    """Per-document state shared by the extractors; whole-page views are computed once, on demand.
+
+    Extractors only use the node primitives below, so the same field logic runs on any backend; a
+    backend must implement all of the abstract ones. `node=None` means the whole document.
+    """
+
+    host = ""
+    stats: Optional["SelectorStats"] = None
+
+    def likely_span(self, group: str, candidates: Tuple[str, ...]) -> int:
+        return self.stats.span(self.host, group, candidates) if self.stats else len(candidates)
+
+    def record_hit(self, group: str, candidate: str) -> None:
+        if self.stats:
+            self.stats.hit(self.host, group, candidate)
+
+    @abstractmethod
+    def select_one(self, css: str, node=None):
+        ...
+
+    @abstractmethod
+    def select(self, css: str, node=None) -> list:
+        ...
+
+    @abstractmethod
+    def text(self, node=None, sep: str = "") -> str:
+        # Same contract as BeautifulSoup's get_text(sep, strip=True)
+        ...
+
+    @abstractmethod
+    def attr(self, node, name: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def tag(self, node) -> str:
+        ...
+
+    @abstractmethod
+    def next_sibling(self, node, tag: str):
+        ...
+
+    @abstractmethod
+    def string(self, node) -> Optional[str]:
+        # Sole text child of a leaf element (script contents), else None
+        ...
+
+    def first_each(self, selectors: Tuple[str, ...]) -> list:
+        # First match of each selector, aligned with `selectors`; backends override with one traversal
+        return [self.select_one(css) for css in selectors]
+
+    @cached_property
+    def page_text(self) -> str:
+        return self.text(None, " ")
+
+    @cached_property
+    def page_lines(self) -> str:
+        return self.text(None, "\n")
+
+    @cached_property
+    def side_info(self) -> Dict[str, str]:
+        out = {}
+        dl = self.select_one("dl.rent_view_side_info")
+        if dl is None:
+            return out
+        cur = None
+        for el in self.select("dt, dd", dl):
+            if self.tag(el) == "dt":
+                cur = self.text(el)
+            elif self.tag(el) == "dd" and cur:
+                out[cur] = self.text(el, " ")
+                cur = None
+        return out
+
+class SoupContext(ParseContext):
+    def __init__(self, html: bytes):
+        self.soup = BeautifulSoup(html, "lxml")
+
+    def select_one(self, css: str, node=None):
+        return _SOUP_SELECTORS[css].select_one(self.soup if node is None else node)
+
+    def select(self, css: str, node=None) -> list:
+        return _SOUP_SELECTORS[css].select(self.soup if node is None else node)
+
+    def text(self, node=None, sep: str = "") -> str:
+        return (self.soup if node is None else node).get_text(sep, strip=True)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+    def tag(self, node) -> str:
+        return node.name
+
+    def next_sibling(self, node, tag: str):
+        return node.find_next_sibling(tag)
+
+    def string(self, node) -> Optional[str]:
+        return node.string
+
+    def first_each(self, selectors: Tuple[str, ...]) -> list:
+        combined, members = _soup_group(selectors)
+        return _first_each(combined.iselect(self.soup), members, lambda sel, el: sel.match(el))
+
+# Tags (by name, class or attribute) holding everything the extractors read except the page text
+_REGION_TAGS = frozenset(("dl", "dt", "dd", "img", "title", "h1", "h2"))
+_REGION_CLASSES = frozenset((
+    "rent_view_ttl", "latitude", "longitude", "address", "addr", "p-address", "detailAddress",
+    "l-property__address", "c-detailAddress", "p-detail__address",
+))
+
+class RegionStrainer(SoupStrainer):
+    """parse_only filter keeping just the extractor regions, each with its whole subtree."""
+
+    def __init__(self):
+        super().__init__()
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        if name in _REGION_TAGS:
+            return True
+        attrs = attrs or {}
+        if name == "script":
+            return attrs.get("type") == "application/ld+json"
+        if attrs.get("itemprop") == "address" or attrs.get("id") == "address":
+            return True
+        classes = attrs.get("class") or ()
+        if isinstance(classes, str):
+            classes = classes.split()
+        return not _REGION_CLASSES.isdisjoint(classes)
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+class PartialSoupContext(SoupContext):
+    """Materializes only the extractor regions; the full tree is built only if a page-text fallback runs."""
+
+    def __init__(self, html: bytes):
+        self.html = html
+        self.soup = BeautifulSoup(html, "lxml", parse_only=RegionStrainer())
+
+    @cached_property
+    def full(self) -> SoupContext:
+        return SoupContext(self.html)
+
+    @cached_property
+    def page_text(self) -> str:
+        return self.full.page_text
+
+    @cached_property
+    def page_lines(self) -> str:
+        return self.full.page_lines
 
-    for sel in candidates:
-        el = soup.select_one(sel)
-        if el:
-            t = el.get_text(" ", strip=True)
-            m = re.search(r"\b(\d{3}-\d{4})\b", t)
-            if m:
-                return m.group(1)
+# BeautifulSoup's get_text leaves out these subtrees (and comments / doctype)
+_SKIP_TEXT_TAGS = frozenset(("script", "style", "template"))
 
-    page = soup.get_text(" ", strip=True)
-    m = re.search(r"\b(\d{3}-\d{4})\b", page)
+class LxmlContext(ParseContext):
+    """lxml.html tree with precompiled XPath: no BeautifulSoup objects, same output."""
+
+    def __init__(self, html: bytes):
+        self.root = _lxml_document(html)
+
+    def select_one(self, css: str, node=None):
+        found = _XPATHS[css](self.root if node is None else node)
+        return found[0] if found else None
+
+    def select(self, css: str, node=None) -> list:
+        return _XPATHS[css](self.root if node is None else node)
+
+    def text(self, node=None, sep: str = "") -> str:
+        node = self.root if node is None else node
+        parts = []
+        if node.text and node.text.strip():
+            parts.append(node.text.strip())
+        # Iterative walk: text before children, tails after each child's subtree
+        stack = [(iter(node), None)]
+        while stack:
+            it, owner = stack[-1]
+            child = next(it, None)
+            if child is None:
+                stack.pop()
+                if owner is not None and owner.tail and owner.tail.strip():
+                    parts.append(owner.tail.strip())
+                continue
+            if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+                if child.text and child.text.strip():
+                    parts.append(child.text.strip())
+                stack.append((iter(child), child))
+            elif child.tail and child.tail.strip():
+                parts.append(child.tail.strip())
+        return sep.join(parts)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+    def tag(self, node) -> str:
+        return node.tag
+
+    def next_sibling(self, node, tag: str):
+        return next(node.itersiblings(tag), None)
+
+    def string(self, node) -> Optional[str]:
+        return node.text if len(node) == 0 else None
+
+    def first_each(self, selectors: Tuple[str, ...]) -> list:
+        combined, members = _xpath_group(selectors)
+        return _first_each(combined(self.root), members, lambda xp, el: xp(el))
+
+def _lxml_document(html: bytes):
+    try:
+        # Without a declared charset libxml2 assumes latin-1; BeautifulSoup would sniff UTF-8
+        if b"charset" not in html[:2048].lower() and b"encoding=" not in html[:100]:
+            try:
+                return lxml.html.document_fromstring(html.decode("utf-8"))
+            except UnicodeDecodeError:
+                pass
+        return lxml.html.document_fromstring(html)
+    except etree.ParserError:
+        return lxml.html.document_fromstring("<html></html>")
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+class LexborContext(ParseContext):
+    """selectolax (Lexbor) tree: HTML5 parsing and CSS matching in C."""
+
+    def __init__(self, html: bytes):
+        # Lexbor takes bytes as UTF-8: decode the way BeautifulSoup would (declared charset, sniffing)
+        markup = UnicodeDammit(html, is_html=True).unicode_markup if html else ""
+        self.tree = LexborHTMLParser(markup or "")
+
+    def select_one(self, css: str, node=None):
+        return (self.tree if node is None else node).css_first(css)
+
+    def select(self, css: str, node=None) -> list:
+        return (self.tree if node is None else node).css(css)
+
+    def text(self, node=None, sep: str = "") -> str:
+        node = self.tree.root if node is None else node
+        parts = []
+        stack = [node.child]
+        while stack:
+            n = stack.pop()
+            if n is None:
+                continue
+            stack.append(n.next)
+            tag = n.tag
+            if tag == "-text":
+                t = n.text_content.strip()
+                if t:
+                    parts.append(t)
+            elif not tag.startswith(("-", "!")) and tag not in _SKIP_TEXT_TAGS:
+                stack.append(n.child)
+        return sep.join(parts)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+    def tag(self, node) -> str:
+        return node.tag
+
+    def next_sibling(self, node, tag: str):
+        n = node.next
+        while n is not None and n.tag != tag:
+            n = n.next
+        return n
+
+    def string(self, node) -> Optional[str]:
+        child = node.child
+        if child is not None and child.next is None and child.tag == "-text":
+            return child.text_content
+        return None
+
+    def first_each(self, selectors: Tuple[str, ...]) -> list:
+        # Node.css_matches is also true when the selector matches inside the node, so a grouped scan would
+        # pick an ancestor for nested candidates; css_first per selector is cheap in Lexbor
+        return [self.tree.css_first(css) for css in selectors]
+
+BACKENDS = {"bs4": SoupContext, "lxml": LxmlContext}
+# Tag-level parse_only filtering needs the ElementFilter API of beautifulsoup4 >= 4.13
+if hasattr(SoupStrainer, "allow_tag_creation"):
+    BACKENDS["bs4-partial"] = PartialSoupContext
+if LexborHTMLParser is not None:
+    BACKENDS["selectolax"] = LexborContext
+
+# Parse options travel to --workers processes with every task; these let stateful helpers
+# (caches, stats) unpickle to one instance per process instead of a fresh copy per page.
+_PROCESS_SHARED: Dict[tuple, object] = {}
+
+def _process_shared(cls, *args):
+    key = (cls, args)
+    obj = _PROCESS_SHARED.get(key)
+    if obj is None:
+        obj = _PROCESS_SHARED[key] = cls(*args)
+    return obj
+
+class SelectorStats:
+    """Per-host hit counts of fallback candidates, persisted in SQLite.
+
+    The counts are only a hint: candidates are always tried in their fixed priority order, so
+    the value that wins never depends on crawl history. Each process (see _process_shared) loads
+    the persisted counts, learns from its own pages and adds its hits back in batches of
+    `flush_every` and once more when the process exits.
+    """
+
+    def __init__(self, path: str, flush_every: int = 50):
+        self.path = path
+        self.flush_every = flush_every
+        self._db = None
+        self._pid = None
+        self._counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._pending: Dict[Tuple[str, str, str], int] = {}
+
+    def __reduce__(self):
+        return _process_shared, (SelectorStats, self.path, self.flush_every)
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS selector_hits ("
+                " host TEXT NOT NULL, grp TEXT NOT NULL, candidate TEXT NOT NULL, hits INTEGER NOT NULL,"
+                " PRIMARY KEY (host, grp, candidate))"
+            )
+            # Pool workers leave through os._exit, which skips atexit but not multiprocessing finalizers
+            multiprocessing.util.Finalize(self, self.flush, exitpriority=10)
+            self._pid = os.getpid()
+            self._counts = {}
+            self._pending = {}
+            for host, grp, candidate, hits in self._db.execute("SELECT host, grp, candidate, hits FROM selector_hits"):
+                self._counts.setdefault((host, grp), {})[candidate] = hits
+        return self._db
+
+    def span(self, host: str, group: str, candidates: Tuple[str, ...]) -> int:
+        """Length of the shortest priority-order prefix that contains the most-hit candidate."""
+        self._conn()
+        counts = self._counts.get((host, group))
+        if not counts:
+            return len(candidates)
+        best = max(candidates, key=lambda c: counts.get(c, 0))
+        return candidates.index(best) + 1 if counts.get(best) else len(candidates)
+
+    def hit(self, host: str, group: str, candidate: str) -> None:
+        self._conn()
+        counts = self._counts.setdefault((host, group), {})
+        counts[candidate] = counts.get(candidate, 0) + 1
+        key = (host, group, candidate)
+        self._pending[key] = self._pending.get(key, 0) + 1
+        if sum(self._pending.values()) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with self._conn():
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO selector_hits (host, grp, candidate, hits) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (host, grp, candidate) DO UPDATE SET hits = hits + excluded.hits",
+                [(*key, n) for key, n in self._pending.items()],
+            )
+        self._pending = {}
+
+POSTCODE_CANDIDATES = (
+    '[itemprop="address"]', ".address", ".addr", ".p-address",
+    ".detailAddress", "#address", ".l-property__address",
+    ".c-detailAddress", ".p-detail__address"
+)
+
+def extract_postcode(ctx: ParseContext) -> Optional[str]:
+    # One traversal finds every candidate's first match; they are then tried in priority order.
+    # With selector stats the prefix up to the host's usual winner is scanned first; the rest is
+    # only scanned when that prefix has no postcode, so the winner is the same either way.
+    span = ctx.likely_span("postcode", POSTCODE_CANDIDATES)
+    for part in (POSTCODE_CANDIDATES[:span], POSTCODE_CANDIDATES[span:]):
+        if not part:
+            continue
+        for sel, el in zip(part, ctx.first_each(part)):
+            if el is not None:
+                t = ctx.text(el, " ")
+                m = RE_POSTCODE.search(t)
+                if m:
+                    ctx.record_hit("postcode", sel)
+                    return m.group(1)
+
+    m = RE_POSTCODE.search(ctx.page_text)
     return m.group(1) if m else None
 
-def extract_address_text_simple(soup: BeautifulSoup) -> Optional[str]:
-    page = soup.get_text("\n", strip=True)
-    m = re.search(r"(\d{3}-\d{4}[^\n]{0,200})", page)
+def extract_address_text_simple(ctx: ParseContext) -> Optional[str]:
+    m = RE_ADDRESS_LINE.search(ctx.page_lines)
     if not m:
         return None
     line = m.group(1)
 
-    line = re.split(r"(TEL|Fax|FAX|電話)", line, maxsplit=1)[0].strip()
+    line = RE_ADDRESS_END.split(line, maxsplit=1)[0].strip()
     return line or None
 
 def split_japanese_address_simple(addr: str) -> Dict[str, Optional[str]]:
-    addr = re.sub(r"^\s*\d{3}-\d{4}\s*", "", addr)
+    addr = RE_LEADING_POSTCODE.sub("", addr)
 
     prefecture = None
     city = None
     rest = addr
 
-    m_pref = re.match(r"(.+?[都道府県])", rest)
+    m_pref = RE_PREFECTURE.match(rest)
     if m_pref:
         prefecture = m_pref.group(1)
         rest = rest[m_pref.end():].strip()
 
-    m_city = re.match(r"(.+?(市|区|郡|町|村))", rest)
+    m_city = RE_CITY.match(rest)
     if m_city:
         city = m_city.group(1)
         rest = rest[m_city.end():].strip()
@@ -88,24 +695,13 @@ def split_japanese_address_simple(addr: str) -> Dict[str, Optional[str]]:
         "chome_banchi": chome_banchi,
     }
 
-def get_side_info_map_simple(soup: BeautifulSoup) -> dict:
-    out = {}
-    dl = soup.select_one("dl.rent_view_side_info")
-    if not dl:
-        return out
-    cur = None
-    for el in dl.find_all(["dt", "dd"]):
-        if el.name == "dt":
-            cur = el.get_text(strip=True)
-        elif el.name == "dd" and cur:
-            out[cur] = el.get_text(" ", strip=True)
-            cur = None
-    return out
+def get_side_info_map_simple(ctx: ParseContext) -> dict:
+    return ctx.side_info
 
 def extract_year_simple(text: Optional[str]) -> Optional[str]:
     if not text:
         return None
-    m = re.search(r"(\d{4})年", text)
+    m = RE_YEAR.search(text)
     return m.group(1) if m else None
 
 def normalize_building_type_simple(jp: Optional[str]) -> Optional[str]:
@@ -123,49 +719,67 @@ def normalize_building_type_simple(jp: Optional[str]) -> Optional[str]:
     return mapping.get(jp, None)
 
 # --- Romanize name (optional) ---
-try:
-    from pykakasi import kakasi
-    _kk = kakasi()
-    _kk.setMode("H", "a"); _kk.setMode("K", "a"); _kk.setMode("J", "a")
-    _conv = _kk.getConverter()
-except Exception:
-    _conv = None
+_conv = None
+_conv_ready = False
+
+def init_romanizer():
+    # Loading the kakasi dictionaries is slow: done once per process (also the pool initializer)
+    global _conv, _conv_ready
+    if _conv_ready:
+        return _conv
+    try:
+        from pykakasi import kakasi
+        _kk = kakasi()
+        _kk.setMode("H", "a"); _kk.setMode("K", "a"); _kk.setMode("J", "a")
+        _conv = _kk.getConverter()
+    except Exception:
+        _conv = None
+    _conv_ready = True
+    return _conv
 
 def to_english_name_simple(text: Optional[str]) -> Optional[str]:
     if not text:
         return None
     t = text.strip()
-    if re.search(r"[A-Za-z]", t):
+    if RE_LATIN.search(t):
         return t
-    if _conv:
-        romaji = _conv.do(t).replace("  ", " ").strip()
+    conv = init_romanizer()
+    if conv:
+        romaji = conv.do(t).replace("  ", " ").strip()
         return " ".join(w.capitalize() for w in romaji.split())
     return t
 
-def extract_building_name_jp_simple(soup: BeautifulSoup) -> Optional[str]:
-    info = get_side_info_map_simple(soup)
-    name = info.get("物件名") or info.get("建物名") or info.get("マンション名")
-    if name:
-        return name.strip()
-
-    h = soup.select_one("h1") or soup.select_one("h2") or soup.select_one(".rent_view_ttl")
-    if h:
-        txt = h.get_text(" ", strip=True)
-        if txt:
-            return txt
-
-    if soup.title:
-        t = soup.title.get_text(strip=True)
-        t = re.split(r"[｜|\\|]", t)[0].strip()
-        if t:
-            return t
+# Side-info labels first, then the first page heading, then the <title>
+BUILDING_NAME_CANDIDATES = ("物件名", "建物名", "マンション名", "heading", "title")
+
+def _building_name_candidate(ctx: ParseContext, candidate: str) -> Optional[str]:
+    if candidate == "heading":
+        for sel in ("h1", "h2", ".rent_view_ttl"):
+            h = ctx.select_one(sel)
+            if h is not None:
+                return ctx.text(h, " ")
+        return None
+    if candidate == "title":
+        title = ctx.select_one("title")
+        if title is None:
+            return None
+        return RE_TITLE_SEP.split(ctx.text(title))[0].strip()
+    name = get_side_info_map_simple(ctx).get(candidate)
+    return name.strip() if name else None
+
+def extract_building_name_jp_simple(ctx: ParseContext) -> Optional[str]:
+    for candidate in BUILDING_NAME_CANDIDATES:
+        name = _building_name_candidate(ctx, candidate)
+        if name:
+            return name
     return None
 
-def extract_map_coords_simple(soup: BeautifulSoup) -> Tuple[Optional[str], Optional[str]]:
-    sc = soup.find("script", type="application/ld+json")
-    if sc and sc.string:
+def extract_map_coords_simple(ctx: ParseContext) -> Tuple[Optional[str], Optional[str]]:
+    sc = ctx.select_one('script[type="application/ld+json"]')
+    body = ctx.string(sc) if sc is not None else None
+    if body:
         try:
-            data = json.loads(sc.string)
+            data = json_loads(body)
             if isinstance(data, dict) and "geo" in data and isinstance(data["geo"], dict):
                 lat = data["geo"].get("latitude")
                 lng = data["geo"].get("longitude")
@@ -175,29 +789,29 @@ def extract_map_coords_simple(soup: BeautifulSoup) -> Tuple[Optional[str], Optio
             pass
     return None, None
 
-def extract_map_coords_basic(soup: BeautifulSoup):
-    lat_el = soup.select_one(".latitude")
-    lng_el = soup.select_one(".longitude")
-    lat = lat_el.get_text(strip=True) if lat_el else None
-    lng = lng_el.get_text(strip=True) if lng_el else None
+def extract_map_coords_basic(ctx: ParseContext):
+    lat_el = ctx.select_one(".latitude")
+    lng_el = ctx.select_one(".longitude")
+    lat = ctx.text(lat_el) if lat_el is not None else None
+    lng = ctx.text(lng_el) if lng_el is not None else None
     return lat, lng
 
-def extract_stations_basic(soup: BeautifulSoup, limit: int = 5):
+def extract_stations_basic(ctx: ParseContext, limit: int = 5):
     result = []
 
-    for dt in soup.select("dt"):
-        if dt.get_text(strip=True) == "交通":
-            dd = dt.find_next_sibling("dd")
-            if not dd:
+    for dt in ctx.select("dt"):
+        if ctx.text(dt) == "交通":
+            dd = ctx.next_sibling(dt, "dd")
+            if dd is None:
                 break
-            for li in dd.select("li"):
-                t = li.get_text(" ", strip=True)
+            for li in ctx.select("li", dd):
+                t = ctx.text(li, " ")
 
-                m = re.search(r"(.+?)／(.+?駅)", t) or re.search(r"(.+?)/(.+?駅)", t)
+                m = RE_LINE_STATION[0].search(t) or RE_LINE_STATION[1].search(t)
                 line = m.group(1).strip() if m else None
                 station = m.group(2).strip() if m else None
 
-                m2 = re.search(r"徒歩\s*(\d+)\s*分", t)
+                m2 = RE_WALK.search(t)
                 walk = m2.group(1) if m2 else None
                 result.append({"line": line, "station": station, "walk": walk})
                 if len(result) >= limit:
@@ -205,10 +819,10 @@ def extract_stations_basic(soup: BeautifulSoup, limit: int = 5):
             break
     return result
 
-def extract_images_basic(soup: BeautifulSoup, base_url: str, limit: int = 8):
+def extract_images_basic(ctx: ParseContext, base_url: str, limit: int = 8):
     urls = []
-    for img in soup.select("img"):
-        src = img.get("data-src") or img.get("src")
+    for img in ctx.select("img"):
+        src = ctx.attr(img, "data-src") or ctx.attr(img, "src")
         if not src or src.startswith("data:"):
             continue
         abs_url = urljoin(base_url, src)
@@ -221,106 +835,1453 @@ def extract_images_basic(soup: BeautifulSoup, base_url: str, limit: int = 8):
 # ==============================
 # 3) Orchestrator
 # ==============================
-def parse_property(url: str, html: bytes) -> Dict[str, Optional[str]]:
-    soup = BeautifulSoup(html, "lxml")
+# Bump when the record assembly in parse_property changes: every ParseCache entry stops matching.
+# An extractor change only needs its own EXTRACTOR_VERSIONS entry bumped.
+PARSER_VERSION = 1
+
+_LANGS = ("en", "ja", "zh_CN", "zh_TW")
+_FEE_KINDS = ("deposit", "key", "guarantor", "agency", "renewal", "deposit_amortization", "security_deposit")
+_FACINGS = ("north", "northeast", "east", "southeast", "south", "southwest", "west", "northwest")
+_UNIT_FEATURES = (
+    "aircon", "aircon_heater", "all_electric", "auto_fill_bath", "balcony", "bath", "bath_water_heater", "blinds",
+    "bs", "cable", "carpet", "cleaning_service", "counter_kitchen", "dishwasher", "drapes", "female_only", "fireplace",
+    "flooring", "full_kitchen", "furnished", "gas", "induction_cooker", "internet_broadband", "internet_wifi",
+    "japanese_toilet", "linen", "loft", "microwave", "oven", "phoneline", "range", "refrigerator",
+    "refrigerator_freezer", "roof_balcony", "separate_toilet", "shower", "soho", "storage", "student_friendly",
+    "system_kitchen", "tatami", "underfloor_heating", "unit_bath", "utensils_cutlery", "veranda", "washer_dryer",
+    "washing_machine", "washlet", "western_toilet", "yard",
+)
+
+# Full output schema in readme order; parse_property fills a subset, the rest are None
+README_COLUMNS: Tuple[str, ...] = (
+    "link", "property_csv_id", "postcode", "prefecture", "city", "district", "chome_banchi", "building_type", "year",
+    *(f"building_{kind}_{lang}" for kind in ("name", "description", "landmarks") for lang in _LANGS),
+    *(f"{kind}_{i}" for i in range(1, 6)
+      for kind in ("station_name", "train_line_name", "walk", "bus", "car", "cycle")),
+    "map_lat", "map_lng", "num_units", "floors", "basement_floors", "parking", "parking_cost", "bicycle_parking",
+    "motorcycle_parking", "structure", "building_notes", "building_style", "autolock", "credit_card", "concierge",
+    "delivery_box", "elevator", "gym", "newly_built", "pets", "swimming_pool", "ur", "room_type", "size", "unit_no",
+    "ad_type", "available_from",
+    *(f"property_{kind}_{lang}" for kind in ("description", "other_expenses") for lang in _LANGS),
+    "featured_a", "featured_b", "featured_c", "floor_no", "monthly_rent", "monthly_maintenance",
+    *(f"{unit}_{kind}" for kind in _FEE_KINDS for unit in ("months", "numeric")),
+    "lock_exchange", "fire_insurance", "other_initial_fees", "other_subscription_fees", "no_guarantor",
+    "guarantor_agency", "guarantor_agency_name", "rent_negotiable", "renewal_new_rent", "lease_date", "lease_months",
+    "lease_type", "short_term_ok", "balcony_size", "property_notes",
+    *(f"facing_{side}" for side in _FACINGS),
+    *_UNIT_FEATURES,
+    "youtube", "vr_link",
+    *(f"image_{kind}_{i}" for i in range(1, 17) for kind in ("category", "url")),
+    "numeric_guarantor_max", "discount", "create_date",
+)
+
+# parse_property output order
+RECORD_FIELDS: Tuple[str, ...] = (
+    "link", "property_csv_id", "postcode", "prefecture", "city", "district", "chome_banchi", "building_type", "year",
+    *(f"building_{kind}_{lang}" for kind in ("name", "description") for lang in _LANGS),
+    "map_lat", "map_lng", "numeric_guarantor_max", "discount", "create_date",
+    *(f"{kind}_{i}" for i in range(1, 6)
+      for kind in ("station_name", "train_line_name", "walk", "bus", "car", "cycle")),
+    *(f"image_{kind}_{i}" for i in range(1, 17) for kind in ("url", "category")),
+)
+_RECORD_INDEX = {name: i for i, name in enumerate(RECORD_FIELDS)}
+_README_SET = frozenset(README_COLUMNS)
+
+@lru_cache(maxsize=64)
+def _field_index(fields: Tuple[str, ...]) -> Dict[str, int]:
+    return {name: i for i, name in enumerate(fields)}
+
+class PropertyRecord(Mapping):
+    """Read-only parse_property result: values against a schema shared by all records of a run
+    (RECORD_FIELDS, or the fields of a projection).
+
+    Only the non-None values are kept, in field order, with a bitmask of which fields they fill; most of the
+    schema is None on a typical page, so a record costs a few hundred bytes of containers instead of a ~1.6 KB
+    dict. Behaves as a Mapping (`record["link"]`, `.get`, `dict(record)`); `as_dict()` builds the plain dict
+    and json_default serializes it to the same JSON as that dict.
+    """
+
+    __slots__ = ("_index", "_mask", "_values")
+
+    def __init__(self, values: tuple, index: Optional[Dict[str, int]] = None):
+        mask = 0
+        for i, value in enumerate(values):
+            if value is not None:
+                mask |= 1 << i
+        self._index = _RECORD_INDEX if index is None else index
+        self._mask = mask
+        self._values = tuple(value for value in values if value is not None)
 
-    info = get_side_info_map_simple(soup)
+    def __getitem__(self, key: str):
+        i = self._index[key]
+        if not self._mask >> i & 1:
+            return None
+        return self._values[(self._mask & ((1 << i) - 1)).bit_count()]
 
-    addr_text = info.get("所在地") or extract_address_text_simple(soup)
-    addr_parts = split_japanese_address_simple(addr_text) if addr_text else {
+    def get(self, key: str, default=None):
+        return self[key] if key in self._index else default
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __reduce__(self):
+        if self._index is _RECORD_INDEX:
+            return PropertyRecord, (tuple(self._iter_values()),)
+        return _projected_record, (tuple(self._iter_values()), tuple(self._index))
+
+    def __repr__(self) -> str:
+        return f"PropertyRecord({self.as_dict()!r})"
+
+    def _iter_values(self) -> Iterator[Optional[str]]:
+        present = iter(self._values)
+        mask = self._mask
+        return (next(present) if mask >> i & 1 else None for i in range(len(self._index)))
+
+    def as_dict(self) -> Dict[str, Optional[str]]:
+        return dict(zip(self._index, self._iter_values()))
+
+    def replace(self, **changes: Optional[str]) -> "PropertyRecord":
+        """Copy with some values changed; names outside this record's schema are ignored."""
+        return PropertyRecord(tuple(changes.get(name, value) for name, value in zip(self._index, self._iter_values())),
+                              self._index)
+
+def _projected_record(values: tuple, fields: Tuple[str, ...]) -> PropertyRecord:
+    return PropertyRecord(values, _field_index(fields))
+
+def json_default(obj):
+    """`default=` hook for json.dump(s): PropertyRecord as its dict."""
+    if isinstance(obj, PropertyRecord):
+        return obj.as_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class BuildingCache:
+    """Building-scoped fields by building id (`/rent/<building>/<room>`), LRU-bounded.
+
+    Rooms of one building share address, postcode, names, year, type, coordinates and stations,
+    so in a batch those are extracted once per building; siblings only parse room-level fields.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return _process_shared, (BuildingCache, self.maxsize)
+
+    def get(self, building_id: str) -> Optional[dict]:
+        with self._lock:
+            fields = self._items.get(building_id)
+            if fields is not None:
+                self._items.move_to_end(building_id)
+            return fields
+
+    def put(self, building_id: str, fields: dict) -> None:
+        with self._lock:
+            self._items[building_id] = fields
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+def _extract_address(ctx: ParseContext, got: dict) -> Dict[str, Optional[str]]:
+    addr_text = get_side_info_map_simple(ctx).get("所在地") or extract_address_text_simple(ctx)
+    return split_japanese_address_simple(addr_text) if addr_text else {
         "prefecture": None, "city": None, "district": None, "chome_banchi": None
     }
 
-    building_type_en = normalize_building_type_simple(info.get("種別"))
-    year_built = extract_year_simple(info.get("築年月"))
+def _extract_map_coords(ctx: ParseContext, got: dict) -> Tuple[Optional[str], Optional[str]]:
+    lat, lng = extract_map_coords_simple(ctx)
+    lat, lng = extract_map_coords_basic(ctx)
+    return lat, lng
+
+# Extractor graph: name -> (extractors it reads from, fn(ctx, results so far)); run in this order
+EXTRACTORS: Dict[str, Tuple[Tuple[str, ...], Callable[[ParseContext, dict], object]]] = {
+    "address": ((), _extract_address),
+    "building_name_ja": ((), lambda ctx, got: extract_building_name_jp_simple(ctx)),
+    "map_coords": ((), _extract_map_coords),
+    "postcode": ((), lambda ctx, got: extract_postcode(ctx)),
+    "building_type": ((), lambda ctx, got: normalize_building_type_simple(get_side_info_map_simple(ctx).get("種別"))),
+    "year": ((), lambda ctx, got: extract_year_simple(get_side_info_map_simple(ctx).get("築年月"))),
+    "building_name_en": (("building_name_ja",), lambda ctx, got: to_english_name_simple(got["building_name_ja"])),
+    "stations": ((), lambda ctx, got: extract_stations_basic(ctx, limit=5)),
+    "images": ((), lambda ctx, got: extract_images_basic(ctx, got["url"], limit=8)),
+}
+# Bump an entry when that extractor's output changes: ParseCache re-runs it (and its dependents) only
+EXTRACTOR_VERSIONS: Dict[str, int] = {name: 1 for name in EXTRACTORS}
+# Rooms of one building share these (see BuildingCache); images are per room
+BUILDING_EXTRACTORS = frozenset(EXTRACTORS) - {"images"}
 
-    name_jp = extract_building_name_jp_simple(soup)
-    building_name_en = to_english_name_simple(name_jp)
+# Output field -> extractor producing it; fields not listed are constant (link, id) or always None
+FIELD_SOURCES: Dict[str, str] = {
+    "postcode": "postcode",
+    **{f: "address" for f in ("prefecture", "city", "district", "chome_banchi")},
+    "building_type": "building_type", "year": "year",
+    "building_name_en": "building_name_en", "building_name_ja": "building_name_ja",
+    "map_lat": "map_coords", "map_lng": "map_coords",
+    **{f"{kind}_{i}": "stations" for kind in ("station_name", "train_line_name", "walk") for i in range(1, 6)},
+    **{f"image_url_{i}": "images" for i in range(1, 17)},
+}
+FIELD_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "address": ("prefecture", "city", "district", "chome_banchi"),
+    "stations": tuple(f for f in RECORD_FIELDS if f.split("_")[-1].isdigit() and not f.startswith("image_")),
+    "images": tuple(f for f in RECORD_FIELDS if f.startswith("image_")),
+}
 
-    lat, lng = extract_map_coords_simple(soup)
-    lat, lng = extract_map_coords_basic(soup)
+@lru_cache(maxsize=64)
+def resolve_fields(names: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Output fields for a projection: groups expanded, duplicates dropped, property_csv_id always first."""
+    fields = ["property_csv_id"]
+    for name in names:
+        for field in FIELD_GROUPS.get(name, (name,)):
+            if field not in fields:
+                fields.append(field)
+    unknown = [f for f in fields if f not in _README_SET]
+    if unknown:
+        raise ValueError(f"unknown output fields: {', '.join(unknown)}")
+    return tuple(fields)
 
-    stations = extract_stations_basic(soup, limit=5)
+@lru_cache(maxsize=64)
+def _projection(names: Tuple[str, ...]) -> Tuple[Dict[str, int], Tuple[str, ...]]:
+    fields = resolve_fields(names)
+    needed = {FIELD_SOURCES[f] for f in fields if f in FIELD_SOURCES}
+    return _field_index(fields), tuple(n for n in EXTRACTORS if n in needed)
 
-    imgs = extract_images_basic(soup, url, limit=8)
+def _run_extractor(ctx: ParseContext, name: str, got: dict) -> None:
+    deps, fn = EXTRACTORS[name]
+    for dep in deps:
+        if dep not in got:
+            _run_extractor(ctx, dep, got)
+    got[name] = fn(ctx, got)
 
-    data: Dict[str, Optional[str]] = {
-        "link": url,
-        "property_csv_id": extract_property_csv_id(url),
-        "postcode": extract_postcode(soup),
+def parse_property(url: str, html: bytes, backend: str = "bs4", stats: Optional[SelectorStats] = None,
+                   buildings: Optional[BuildingCache] = None,
+                   fields: Optional[Iterable[str]] = None) -> "PropertyRecord":
+    """Parse one property page. `fields` (output fields or FIELD_GROUPS names) limits the record to those
+    fields and runs only the extractors they depend on."""
+    return _parse_property(url, html, backend, stats, buildings, fields)[0]
 
-        "prefecture": addr_parts.get("prefecture"),
-        "city": addr_parts.get("city"),
-        "district": addr_parts.get("district"),
-        "chome_banchi": addr_parts.get("chome_banchi"),
+def _parse_property(url: str, html: bytes, backend: str = "bs4", stats: Optional[SelectorStats] = None,
+                    buildings: Optional[BuildingCache] = None, fields: Optional[Iterable[str]] = None,
+                    known: Optional[dict] = None) -> Tuple["PropertyRecord", dict]:
+    """parse_property starting from `known` extractor results of this page; also returns the ones it ran."""
+    index, needed = (_RECORD_INDEX, tuple(EXTRACTORS)) if fields is None else _projection(tuple(fields))
 
-        "building_type": building_type_en,
-        "year": year_built,
+    got = {"url": url, **(known or {})}
+    building_id = extract_building_id(url) if buildings is not None else None
+    if building_id:
+        for name, value in (buildings.get(building_id) or {}).items():
+            got.setdefault(name, value)
+    missing = [name for name in needed if name not in got]
+    computed = {}
+    if missing:
+        ctx = BACKENDS[backend](html)
+        if stats is not None:
+            ctx.host, ctx.stats = urlparse(url).hostname or "", stats
+        before = set(got)
+        for name in missing:
+            if name not in got:
+                _run_extractor(ctx, name, got)
+        computed = {name: value for name, value in got.items() if name not in before}
+        if building_id and not BUILDING_EXTRACTORS.isdisjoint(missing):
+            buildings.put(building_id, {k: v for k, v in got.items() if k in BUILDING_EXTRACTORS})
 
-        "building_name_en": building_name_en,
-        "building_name_ja": name_jp,
-        "building_name_zh_CN": None,
-        "building_name_zh_TW": None,
+    addr_parts = got.get("address") or {}
+    lat, lng = got.get("map_coords") or (None, None)
+    stations = got.get("stations") or ()
+    imgs = got.get("images") or ()
 
-        "building_description_en": None,
-        "building_description_ja": None,
-        "building_description_zh_CN": None,
-        "building_description_zh_TW": None,
+    values = [
+        url, extract_property_csv_id(url), got.get("postcode"),
+        addr_parts.get("prefecture"), addr_parts.get("city"), addr_parts.get("district"),
+        addr_parts.get("chome_banchi"),
+        got.get("building_type"), got.get("year"),
+        got.get("building_name_en"), got.get("building_name_ja"), None, None,
+        None, None, None, None,
+        lat, lng,
+        None, None, None,
+    ]
+    for i in range(5):
+        src = stations[i] if i < len(stations) else {}
+        values += (src.get("station"), src.get("line"), src.get("walk"), None, None, None)
+    for i in range(16):
+        values += (imgs[i] if i < len(imgs) else None, None)
+    if index is _RECORD_INDEX:
+        return PropertyRecord(tuple(values)), computed
+    record = PropertyRecord(tuple(values[_RECORD_INDEX[f]] if f in _RECORD_INDEX else None for f in index), index)
+    return record, computed
 
-        "map_lat": lat,
-        "map_lng": lng,
+@lru_cache(maxsize=None)
+def extractor_version(name: str) -> str:
+    """Cache version of an extractor's result: PARSER_VERSION plus its own and its dependencies' versions."""
+    deps, _ = EXTRACTORS[name]
+    return ".".join([str(PARSER_VERSION), str(EXTRACTOR_VERSIONS[name]),
+                     *(extractor_version(dep) for dep in deps)])
 
-        "numeric_guarantor_max": None,
-        "discount": None,
-        "create_date": None,
-    }
+class ParseCache:
+    """SQLite cache of extractor results keyed by (page SHA-256, link, extractor).
+
+    Each entry carries extractor_version(): bumping one EXTRACTOR_VERSIONS entry re-runs that extractor (and
+    the ones reading from it) on cached pages while the others are still served from the cache; bumping
+    PARSER_VERSION invalidates everything. The link is part of the key because images are resolved against
+    it, so the same bytes served at two URLs get two entries.
+
+    Pickles by path (see _process_shared): each worker process keeps one instance and connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = None
+        self._pid = None
+
+    def __reduce__(self):
+        return _process_shared, (ParseCache, self.path)
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS extractor_cache ("
+                " content_hash TEXT NOT NULL, link TEXT NOT NULL, extractor TEXT NOT NULL,"
+                " version TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (content_hash, link, extractor))"
+            )
+            self._pid = os.getpid()
+        return self._db
+
+    def get(self, content_hash: str, url: str) -> dict:
+        """Current-version extractor results for this page at this URL."""
+        rows = self._conn().execute(
+            "SELECT extractor, version, value FROM extractor_cache WHERE content_hash = ? AND link = ?",
+            (content_hash, url),
+        ).fetchall()
+        return {name: json_loads(value) for name, version, value in rows
+                if name in EXTRACTORS and version == extractor_version(name)}
+
+    def put(self, content_hash: str, url: str, results: dict) -> None:
+        if not results:
+            return
+        with self._conn() as db:
+            db.execute("BEGIN")
+            db.executemany(
+                "INSERT OR REPLACE INTO extractor_cache (content_hash, link, extractor, version, value)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(content_hash, url, name, extractor_version(name), json_dumps(value).decode("utf-8"))
+                 for name, value in results.items()],
+            )
+
+def parse_property_cached(url: str, html: bytes, cache: Optional[ParseCache] = None, backend: str = "bs4",
+                          stats: Optional[SelectorStats] = None, buildings: Optional[BuildingCache] = None,
+                          fields: Optional[Iterable[str]] = None) -> "PropertyRecord":
+    if cache is None:
+        return parse_property(url, html, backend, stats, buildings, fields)
+    content_hash = hashlib.sha256(html).hexdigest()
+    record, computed = _parse_property(url, html, backend, stats, buildings, fields, cache.get(content_hash, url))
+    cache.put(content_hash, url, computed)
+    return record
+
+# ==============================
+# 4) Page store (content-addressed)
+# ==============================
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class PageStore:
+    """Keeps every fetched page once under its SHA-256, compressed and sharded.
+
+    Layout: <root>/objects/ab/cd/<sha256>.zst (or .gz without zstandard) plus an
+    append-only index.tsv of `property_csv_id<TAB>sha256<TAB>url`; the last line wins.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, "index.tsv")
+        self.ext = ".zst" if zstandard else ".gz"
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def _path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest[2:4], digest + ext)
+
+    def put(self, html: bytes) -> str:
+        digest = hashlib.sha256(html).hexdigest()
+        path = self._path(digest, self.ext)
+        if os.path.exists(path):
+            return digest
+        if zstandard:
+            blob = zstandard.ZstdCompressor(level=10).compress(html)
+        else:
+            blob = gzip.compress(html, compresslevel=6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, blob)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        path = self._path(digest, ".zst")
+        if os.path.exists(path):
+            if not zstandard:
+                raise OSError(f"{path}: zstandard is required to read this page")
+            with open(path, "rb") as f:
+                return zstandard.ZstdDecompressor().decompress(f.read())
+        with open(self._path(digest, ".gz"), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def save(self, url: str, html: bytes) -> str:
+        digest = self.put(html)
+        line = f"{extract_property_csv_id(url)}\t{digest}\t{url}\n"
+        with self._lock, open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(line)
+        return digest
+
+    def latest(self) -> Dict[str, Tuple[str, str]]:
+        out: Dict[str, Tuple[str, str]] = {}
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) == 3:
+                        out[parts[0]] = (parts[1], parts[2])
+        except FileNotFoundError:
+            pass
+        return out
+
+# ==============================
+# 5) Discovery (search-result / listing pages)
+# ==============================
+RE_RENT_MAN = re.compile(r"(\d+(?:[.,]\d+)*)\s*万円")
+RE_RENT_YEN = re.compile(r"(\d{1,3}(?:,\d{3})+|\d+)\s*円")
+RE_LAYOUT = re.compile(r"(?<![0-9A-Za-z])(\d+S?(?:LDK|DK|K|R))(?![A-Za-z])|(ワンルーム)")
+NEXT_PAGE_LABELS = frozenset(("次へ", "次のページ", "次へ>", "次へ＞", "次", "›", "»", ">", "＞"))
+
+class ListingEntry(NamedTuple):
+    url: str
+    property_csv_id: Optional[str]
+    monthly_rent: Optional[str]
+    room_type: Optional[str]
+
+def _listing_rent(text: str) -> Optional[str]:
+    m = RE_RENT_MAN.search(text)
+    if m:
+        return str(int(Decimal(m.group(1).replace(",", "")) * 10000))
+    m = RE_RENT_YEN.search(text)
+    return m.group(1).replace(",", "") if m else None
+
+def parse_listing_page(url: str, html: bytes) -> Tuple[List[ListingEntry], Optional[str]]:
+    """Detail links (with any rent/layout shown next to them) and the next-page URL of a listing page."""
+    ctx = LxmlContext(html)
+    first_anchor: "OrderedDict[str, tuple]" = OrderedDict()
+    ids_under: Dict[object, set] = defaultdict(set)
+    next_url = None
+
+    for a in ctx.root.iter("a", "link"):
+        href = a.get("href")
+        if not href:
+            continue
+        abs_url = urljoin(url, href)
+        m = RE_CSV_ID.search(abs_url)
+        if m and a.tag == "a":
+            csv_id = f"{m.group(1)}_{m.group(2)}"
+            first_anchor.setdefault(csv_id, (abs_url[:m.end()], a))
+            for anc in a.iterancestors():
+                ids_under[anc].add(csv_id)
+        elif next_url is None and ("next" in (a.get("rel") or "").split()
+                                   or (a.tag == "a" and ctx.text(a) in NEXT_PAGE_LABELS)):
+            next_url = abs_url
+
+    entries = []
+    for csv_id, (detail_url, a) in first_anchor.items():
+        # Summary card = the largest ancestor that links to this property only
+        card = a
+        for anc in a.iterancestors():
+            if ids_under[anc] != {csv_id}:
+                break
+            card = anc
+        text = ctx.text(card, " ")
+        layout = RE_LAYOUT.search(text)
+        entries.append(ListingEntry(
+            url=detail_url,
+            property_csv_id=csv_id,
+            monthly_rent=_listing_rent(text),
+            room_type=(layout.group(1) or layout.group(2)) if layout else None,
+        ))
+    return entries, next_url
+
+def harvest_listing(start_url: str, fetch: Callable[[str], bytes], max_pages: int = 50) -> List[ListingEntry]:
+    """Follow a search result's pagination and collect every property it lists, deduplicated.
+
+    A page that cannot be fetched is reported and ends the pagination; the properties found so far are kept.
+    """
+    entries: "OrderedDict[str, ListingEntry]" = OrderedDict()
+    seen_pages = set()
+    page_url: Optional[str] = start_url
+    while page_url and page_url not in seen_pages and len(seen_pages) < max_pages:
+        seen_pages.add(page_url)
+        try:
+            html = fetch(page_url)
+        except requests.RequestException as e:
+            _report_failure(page_url, e, "listing_failed")
+            break
+        page_entries, page_url = parse_listing_page(page_url, html)
+        for entry in page_entries:
+            entries.setdefault(entry.property_csv_id, entry)
+    print(f"Harvested {len(entries)} properties from {len(seen_pages)} listing pages", file=sys.stderr)
+    return list(entries.values())
+
+def fill_from_listing(record: PropertyRecord, entry: ListingEntry) -> PropertyRecord:
+    """The listing card's rent and layout, for the fields the detail page left empty."""
+    changes = {name: getattr(entry, name) for name in ("monthly_rent", "room_type")
+               if record.get(name, False) is None and getattr(entry, name) is not None}
+    return record.replace(**changes) if changes else record
+
+class SitemapEntry(NamedTuple):
+    url: str
+    property_csv_id: Optional[str]
+    lastmod: Optional[str]
+
+def _open_sitemap(source: str, session: requests.Session):
+    if not source.startswith(("http://", "https://")):
+        stream = open(source, "rb")
+    else:
+        res = session.get(source, stream=True, timeout=60)
+        res.raise_for_status()
+        res.raw.decode_content = True  # undo Content-Encoding; .xml.gz bodies are handled below
+        res.raw.auto_close = False  # let the buffered reader see EOF instead of a closed stream
+        stream = io.BufferedReader(res.raw)
+    if stream.peek(2)[:2] == b"\x1f\x8b":
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+# A child sitemap that cannot be fetched, decompressed or parsed is reported and skipped
+# (BadGzipFile is an OSError)
+SITEMAP_ERRORS = (requests.RequestException, etree.XMLSyntaxError, OSError, EOFError, zlib.error)
+
+def iter_sitemap(source: str, session: requests.Session, since: Optional[str] = None,
+                 max_depth: int = 3) -> Iterator[SitemapEntry]:
+    """Stream property URLs out of a sitemap or sitemap index (optionally gzipped), in constant memory.
+
+    Entries whose <lastmod> is older than `since` (ISO date/datetime) are skipped. `source` may be a
+    local file; <loc> values are resolved against it when it is a URL, and child sitemaps must be http(s).
+    """
+    base = source if source.startswith(("http://", "https://")) else ""
+    children = []
+    with _open_sitemap(source, session) as f:
+        for _, el in etree.iterparse(f, events=("end",), huge_tree=True):
+            kind = etree.QName(el).localname
+            if kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in el:
+                name = etree.QName(child).localname
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = (child.text or "").strip() or None
+            # Drop parsed entries so the tree never grows past one <url>
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+
+            if not loc or (since and lastmod and lastmod < since):
+                continue
+            loc = urljoin(base, loc)
+            if kind == "sitemap":
+                children.append(loc)
+            elif RE_CSV_ID.search(loc):
+                yield SitemapEntry(loc, extract_property_csv_id(loc), lastmod)
+
+    if max_depth > 0:
+        for child in children:
+            # A sitemap must never make us open local files
+            if not child.startswith(("http://", "https://")):
+                _report_failure(child, ValueError("child sitemap is not an http(s) URL"), "sitemap_skipped")
+                continue
+            try:
+                yield from iter_sitemap(child, session, since, max_depth - 1)
+            except SITEMAP_ERRORS as e:
+                _report_failure(child, e, "sitemap_failed")
+
+# ==============================
+# 6) Crawl frontier (SQLite, shared by worker processes)
+# ==============================
+class Frontier:
+    """Persistent URL queue keyed by property_csv_id, safe for several crawler processes.
+
+    WAL mode lets readers and the single writer overlap; claims lease a batch of rows in one
+    UPDATE .. RETURNING, so two processes never get the same row. A crashed worker's leases
+    expire after `lease_seconds` and the rows are handed out again, until `max_attempts`. Acks are
+    buffered until flush(), which the caller runs once the acked records are durable. Re-seeding a
+    finished row requeues it only when its sitemap lastmod moved forward. Within a process, claims
+    (on the crawl's URL-source thread) and acks/fails (on the event loop) share one lock.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 300, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._done: List[str] = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " property_csv_id TEXT PRIMARY KEY, url TEXT NOT NULL, lastmod TEXT,"
+            " state TEXT NOT NULL DEFAULT 'pending', lease_owner TEXT, lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, lease_until)")
 
-    data.update({
-        "map_lat": lat,
-        "map_lng": lng,
-    })
+    def add(self, entries: Iterable[Tuple[str, Optional[str]]], batch: int = 5000) -> int:
+        sql = (
+            "INSERT INTO frontier (property_csv_id, url, lastmod) VALUES (?, ?, ?)"
+            " ON CONFLICT (property_csv_id) DO UPDATE SET url = excluded.url,"
+            " lastmod = COALESCE(excluded.lastmod, frontier.lastmod),"
+            " state = CASE WHEN frontier.state IN ('done', 'failed') AND excluded.lastmod IS NOT NULL"
+            "   AND (frontier.lastmod IS NULL OR excluded.lastmod > frontier.lastmod)"
+            "   THEN 'pending' ELSE frontier.state END,"
+            " attempts = CASE WHEN frontier.state IN ('done', 'failed') AND excluded.lastmod IS NOT NULL"
+            "   AND (frontier.lastmod IS NULL OR excluded.lastmod > frontier.lastmod)"
+            "   THEN 0 ELSE frontier.attempts END"
+        )
+        added = 0
+        rows = ((extract_property_csv_id(url), url, lastmod) for url, lastmod in entries)
+        while True:
+            chunk = list(islice(rows, batch))
+            if not chunk:
+                return added
+            # URLs without a property id are skipped; a chunk of only those is not the end of the source
+            chunk = [row for row in chunk if row[0]]
+            if not chunk:
+                continue
+            with self._lock, self._db:
+                self._db.execute("BEGIN IMMEDIATE")
+                self._db.executemany(sql, chunk)
+            added += len(chunk)
 
-    for i in range(1, 6):
-        src = stations[i - 1] if i - 1 < len(stations) else {}
-        data[f"station_name_{i}"] = src.get("station")
-        data[f"train_line_name_{i}"] = src.get("line")
-        data[f"walk_{i}"] = src.get("walk")
-        data[f"bus_{i}"] = None
-        data[f"car_{i}"] = None
-        data[f"cycle_{i}"] = None
+    def claim(self, n: int = 100) -> List[Tuple[str, str]]:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            # Expired leases count as failed attempts: park the rows that used them all up
+            self._db.execute(
+                "UPDATE frontier SET state = 'failed', lease_owner = NULL, lease_until = NULL"
+                " WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            return self._db.execute(
+                "UPDATE frontier SET state = 'leased', lease_owner = ?, lease_until = ?, attempts = attempts + 1"
+                " WHERE property_csv_id IN (SELECT property_csv_id FROM frontier"
+                "  WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) LIMIT ?)"
+                " RETURNING property_csv_id, url",
+                (self.owner, now + self.lease_seconds, now, n),
+            ).fetchall()
 
-    for i in range(1, 17):
-        url_i = imgs[i - 1] if i - 1 < len(imgs) else None
-        data[f"image_url_{i}"] = url_i
-        data[f"image_category_{i}"] = None
+    def iter_claims(self, batch: int = 100) -> Iterator[str]:
+        while True:
+            claimed = self.claim(batch)
+            if not claimed:
+                return
+            for _, url in claimed:
+                yield url
 
-    return data
+    def ack(self, property_csv_id: str) -> None:
+        with self._lock:
+            self._done.append(property_csv_id)
+
+    def flush(self) -> None:
+        with self._lock, self._db:
+            done, self._done = self._done, []
+            if not done:
+                return
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "UPDATE frontier SET state = 'done', lease_owner = NULL, lease_until = NULL"
+                " WHERE property_csv_id = ? AND lease_owner = ?",
+                [(csv_id, self.owner) for csv_id in done],
+            )
+
+    def fail(self, property_csv_id: str) -> None:
+        # Back to the queue until max_attempts, then parked as failed
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute(
+                "UPDATE frontier SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " lease_owner = NULL, lease_until = NULL WHERE property_csv_id = ? AND lease_owner = ?",
+                (self.max_attempts, property_csv_id, self.owner),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._db.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state").fetchall())
 
 # ==============================
-# 4) CLI
+# 7) Batch
 # ==============================
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+def read_urls(path: str) -> List[str]:
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def _check_resumable(path: str, resume_at: int) -> None:
+    # Starting a fresh file here would silently lose every record the checkpoint counts as written
+    if not os.path.exists(path) or os.path.getsize(path) < resume_at:
+        raise ValueError(f"{path}: cannot resume, the output is missing or shorter than its checkpoint; "
+                         "restore it or rerun without --resume")
+
+class JsonArrayWriter:
+    """Streams records into a JSON array so a batch never sits in memory.
+
+    With `resume_at` (an offset from `checkpoint()`), an existing file is cut back to that point and extended.
+    """
+
+    def __init__(self, path: str, resume_at: Optional[int] = None, count: int = 0):
+        if resume_at is not None:
+            _check_resumable(path, resume_at)
+            self._f = open(path, "r+b")
+            self._f.seek(resume_at)
+            self._f.truncate()
+            self.count = count
+        else:
+            self._f = open(path, "wb")
+            self._f.write(b"[")
+            self.count = 0
+
+    def write(self, record: dict) -> None:
+        self._f.write(b",\n" if self.count else b"\n")
+        self._f.write(json_dumps(record, indent=True))
+        self.count += 1
+
+    def checkpoint(self) -> int:
+        """Flush to disk and return the offset just past the last record."""
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return self._f.tell()
+
+    def close(self) -> None:
+        self._f.write(b"\n]\n")
+        self._f.close()
+
+class NdjsonWriter:
+    """One compact record per line, buffered and written in `chunk_size` pieces."""
+
+    def __init__(self, path: str, resume_at: Optional[int] = None, count: int = 0, chunk_size: int = 1 << 20):
+        if resume_at is not None:
+            _check_resumable(path, resume_at)
+            self._f = open(path, "r+b")
+            self._f.seek(resume_at)
+            self._f.truncate()
+            self.count = count
+        else:
+            self._f = open(path, "wb")
+            self.count = 0
+        self.chunk_size = chunk_size
+        self._buf: List[bytes] = []
+        self._size = 0
+
+    def write(self, record: dict) -> None:
+        line = json_dumps(record) + b"\n"
+        self._buf.append(line)
+        self._size += len(line)
+        self.count += 1
+        if self._size >= self.chunk_size:
+            self._drain()
+
+    def _drain(self) -> None:
+        self._f.write(b"".join(self._buf))
+        self._buf = []
+        self._size = 0
+
+    def checkpoint(self) -> int:
+        self._drain()
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return self._f.tell()
+
+    def close(self) -> None:
+        self._drain()
+        self._f.close()
+
+class CsvWriter:
+    """`columns` (default README_COLUMNS) rows through csv.writer, buffered `chunk_rows` at a time.
+
+    A `.gz` path is gzip-compressed; each checkpoint closes a gzip member so the file can be cut back to it on
+    resume (concatenated members read as one stream). With `part_rows`, rows are split across
+    `<stem>-00000.csv[.gz]`, `<stem>-00001.csv[.gz]`, ..., each with its own header; checkpoint offsets then refer
+    to the part holding the last written row.
+    """
+
+    def __init__(self, path: str, resume_at: Optional[int] = None, count: int = 0, part_rows: int = 0,
+                 chunk_rows: int = 1000, columns: Optional[Tuple[str, ...]] = None):
+        self.path = path
+        self.columns = columns or README_COLUMNS
+        self.compress = path.endswith(".gz")
+        self.part_rows = part_rows
+        self.chunk_rows = chunk_rows
+        self.count = 0
+        self._rows: List[list] = []
+        self._raw = self._gz = None
+        if resume_at is not None:
+            _check_resumable(self._part_path(self._part_of(count)), resume_at)
+            self.count = count
+            self._open(self._part_of(count), resume_at)
+            part = self._part_of(count) + 1
+            while self.part_rows and os.path.exists(self._part_path(part)):
+                os.remove(self._part_path(part))
+                part += 1
+        else:
+            self._open(0)
+
+    def _part_of(self, count: int) -> int:
+        return (count - 1) // self.part_rows if self.part_rows and count else 0
+
+    def _part_path(self, part: int) -> str:
+        if not self.part_rows:
+            return self.path
+        base, gz = (self.path[:-3], ".gz") if self.compress else (self.path, "")
+        stem, ext = os.path.splitext(base)
+        return f"{stem}-{part:05d}{ext or '.csv'}{gz}"
+
+    def _open(self, part: int, resume_at: Optional[int] = None) -> None:
+        self._part = part
+        if resume_at is None:
+            self._raw = open(self._part_path(part), "wb")
+        else:
+            self._raw = open(self._part_path(part), "r+b")
+            self._raw.seek(resume_at)
+            self._raw.truncate()
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb") if self.compress else None
+        if resume_at is None:
+            self._emit([self.columns])
+
+    def _emit(self, rows: List) -> None:
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(rows)
+        (self._gz or self._raw).write(buf.getvalue().encode("utf-8"))
+
+    def write(self, record: dict) -> None:
+        if self.part_rows and self.count and self.count % self.part_rows == 0:
+            self._drain()
+            self._close_part()
+            self._open(self._part + 1)
+        self._rows.append([record.get(c) for c in self.columns])
+        self.count += 1
+        if len(self._rows) >= self.chunk_rows:
+            self._drain()
+
+    def _drain(self) -> None:
+        if self._rows:
+            self._emit(self._rows)
+            self._rows = []
+
+    def checkpoint(self) -> int:
+        self._drain()
+        if self._gz:
+            self._gz.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        offset = self._raw.tell()
+        if self._gz:
+            self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        return offset
+
+    def _close_part(self) -> None:
+        if self._gz:
+            self._gz.close()
+        self._raw.close()
+
+    def close(self) -> None:
+        self._drain()
+        self._close_part()
+
+class SqliteWriter:
+    """Upserts records into a `properties` table (one column per README_COLUMNS field) keyed by property_csv_id.
+
+    Rows are buffered and written `batch` at a time with one prepared statement in a single transaction (WAL mode).
+    `content_hash` is the SHA-256 of the record; a row whose hash is unchanged is left untouched, so its
+    `fetched_at` stays the time the current content was first seen. The upsert is idempotent, so resuming needs
+    no offset. With `columns` (a projection including property_csv_id) only those columns are written.
+    """
+
+    def __init__(self, path: str, resume_at: Optional[int] = None, count: int = 0, batch: int = 1000,
+                 columns: Optional[Tuple[str, ...]] = None):
+        self.path = path
+        self.columns = columns or README_COLUMNS
+        self.batch = batch
+        if resume_at is not None:
+            _check_resumable(path, resume_at)
+        self.count = count if resume_at is not None else 0
+        self.changed = 0
+        self._resumed = self.count
+        self._rows: List[tuple] = []
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        cols = [f'"{c}"' for c in README_COLUMNS]
+        defs = ", ".join(c + " TEXT PRIMARY KEY" if c == '"property_csv_id"' else c for c in cols)
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS properties ({defs}, content_hash TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        cols = [f'"{c}"' for c in self.columns] + ["content_hash", "fetched_at"]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c != '"property_csv_id"')
+        self._sql = (
+            f"INSERT INTO properties ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+            f" ON CONFLICT (property_csv_id) DO UPDATE SET {updates}"
+            " WHERE properties.content_hash != excluded.content_hash"
+        )
+
+    def write(self, record: dict) -> None:
+        digest = hashlib.sha256(json_dumps(record)).hexdigest()
+        self._rows.append((*(record.get(c) for c in self.columns), digest, time.time()))
+        self.count += 1
+        if len(self._rows) >= self.batch:
+            self._drain()
+
+    def _drain(self) -> None:
+        if not self._rows:
+            return
+        before = self._db.total_changes
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(self._sql, self._rows)
+        self.changed += self._db.total_changes - before
+        self._rows = []
+
+    def checkpoint(self) -> int:
+        self._drain()
+        return 0
+
+    def close(self) -> None:
+        self._drain()
+        self._db.close()
+        unchanged = self.count - self._resumed - self.changed
+        print(f"{self.path}: {self.changed} rows inserted or updated, {unchanged} unchanged",
+              file=sys.stderr)
+
+_INT_COLUMNS = frozenset((
+    "year", "num_units", "floors", "basement_floors", "floor_no", "lease_months", "monthly_rent",
+    "monthly_maintenance", "parking_cost", "numeric_guarantor_max", "discount",
+    *(f"{kind}_{i}" for kind in ("walk", "bus", "car", "cycle") for i in range(1, 6)),
+    *(f"numeric_{kind}" for kind in _FEE_KINDS),
+))
+_FLOAT_COLUMNS = frozenset(("map_lat", "map_lng", "size", "balcony_size", *(f"months_{kind}" for kind in _FEE_KINDS)))
+_FLAG_COLUMNS = frozenset((
+    "parking", "bicycle_parking", "motorcycle_parking", "autolock", "credit_card", "concierge", "delivery_box",
+    "elevator", "gym", "newly_built", "pets", "swimming_pool", "ur", "featured_a", "featured_b", "featured_c",
+    "no_guarantor", "rent_negotiable", "renewal_new_rent", "short_term_ok",
+    *(f"facing_{side}" for side in _FACINGS), *_UNIT_FEATURES,
+))
+
+def _typed(column: str, value):
+    """Value of an output field as its Arrow column type; raises ValueError when it does not fit."""
+    if value is None:
+        return None
+    if column in _FLAG_COLUMNS:
+        if value not in ("Y", "N"):
+            raise ValueError(value)
+        return value == "Y"
+    if column in _INT_COLUMNS:
+        return int(Decimal(str(value).replace(",", "")))
+    if column in _FLOAT_COLUMNS:
+        return float(str(value).replace(",", ""))
+    return value
+
+class ArrowWriter:
+    """`columns` (default README_COLUMNS) as typed columns (ints, floats, Y/N flags as booleans, the rest strings)
+    in Parquet or Arrow IPC (Feather) files, written a row group of `row_group_size` records at a time.
+
+    A value that does not parse as its column type is stored as null and counted. The footer is only written on
+    close, so these files cannot be resumed.
+    """
+
+    durable_checkpoints = False
+
+    def __init__(self, path: str, resume_at: Optional[int] = None, count: int = 0, ipc: bool = False,
+                 row_group_size: int = 10000, columns: Optional[Tuple[str, ...]] = None):
+        if resume_at is not None:
+            raise ValueError(f"{path}: Parquet/Arrow output cannot be resumed, rerun without --resume")
+        types = {c: pyarrow.int64() for c in _INT_COLUMNS}
+        types.update({c: pyarrow.float64() for c in _FLOAT_COLUMNS})
+        types.update({c: pyarrow.bool_() for c in _FLAG_COLUMNS})
+        self.columns = columns or README_COLUMNS
+        self.schema = pyarrow.schema([(c, types.get(c, pyarrow.string())) for c in self.columns])
+        if ipc:
+            self._writer = pyarrow.ipc.new_file(path, self.schema)
+        else:
+            self._writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+        self.path = path
+        self.row_group_size = row_group_size
+        self.count = 0
+        self.untyped = 0
+        self._pending = 0
+        self._columns: Dict[str, list] = {c: [] for c in self.columns}
+
+    def write(self, record: dict) -> None:
+        for column, values in self._columns.items():
+            value = record.get(column)
+            try:
+                values.append(_typed(column, value))
+            except (ValueError, ArithmeticError):
+                values.append(None)
+                self.untyped += 1
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.row_group_size:
+            self._drain()
+
+    def _drain(self) -> None:
+        if self._pending:
+            self._writer.write_table(pyarrow.Table.from_pydict(self._columns, schema=self.schema))
+            self._columns = {c: [] for c in self.columns}
+            self._pending = 0
+
+    def checkpoint(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        self._drain()
+        self._writer.close()
+        if self.untyped:
+            print(f"{self.path}: {self.untyped} values did not match their column type, stored as null",
+                  file=sys.stderr)
+
+SINKS = {"json": JsonArrayWriter, "ndjson": NdjsonWriter, "csv": CsvWriter, "sqlite": SqliteWriter}
+SINK_BY_EXT = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv",
+               ".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite"}
+if pyarrow is not None:
+    SINKS.update({"parquet": ArrowWriter, "arrow": partial(ArrowWriter, ipc=True)})
+    SINK_BY_EXT.update({".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"})
+
+def sink_format(path: str, fmt: Optional[str] = None) -> str:
+    """Output format for `path`: `fmt` if given, else from the file extension, else JSON array."""
+    name = path.lower()
+    return fmt or SINK_BY_EXT.get(os.path.splitext(name[:-3] if name.endswith(".csv.gz") else name)[1], "json")
+
+def open_sink(path: str, fmt: Optional[str] = None, resume_at: Optional[int] = None, count: int = 0,
+              part_rows: int = 0, columns: Optional[Tuple[str, ...]] = None):
+    """Output writer for `path`; tabular formats write `columns` (a field projection) instead of the full schema."""
+    fmt = sink_format(path, fmt)
+    if fmt == "csv":
+        return CsvWriter(path, resume_at, count, part_rows=part_rows, columns=columns)
+    if fmt in ("json", "ndjson"):
+        return SINKS[fmt](path, resume_at, count)
+    return SINKS[fmt](path, resume_at, count, columns=columns)
+
+class Checkpoint:
+    """Progress log kept next to a batch output (`<out>.ckpt`).
+
+    Ids of written records are appended in blocks, each closed by an `@ <offset> <count>` line once the output is
+    on disk up to `offset`. Resuming keeps the complete blocks and drops a block cut short by a crash.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.done = set()
+        self.offset: Optional[int] = None
+        self.count = 0
+        self._pending: List[str] = []
+        end = 0
+        if resume and os.path.exists(path):
+            block = []
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # the tail of a commit cut short mid-write
+                    if line.startswith(b"@ "):
+                        _, offset, count = line.split()
+                        self.offset, self.count = int(offset), int(count)
+                        self.done.update(block)
+                        block = []
+                        end = f.tell()
+                    elif line.strip():
+                        block.append(line.strip().decode())
+        self._f = open(path, "r+b" if end else "wb")
+        self._f.seek(end)
+        self._f.truncate()
+
+    def add(self, property_csv_id: str) -> int:
+        self._pending.append(property_csv_id)
+        return len(self._pending)
+
+    def commit(self, offset: int, count: int) -> None:
+        self._f.write("".join(f"{i}\n" for i in self._pending).encode() + f"@ {offset} {count}\n".encode())
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self.done.update(self._pending)
+        self._pending = []
+
+    def close(self) -> None:
+        self._f.close()
+
+def make_fetcher(session: requests.Session, cache: Optional[HttpCache] = None,
+                 store: Optional[PageStore] = None) -> Callable[[str], bytes]:
+    def fetch(url: str) -> bytes:
+        html = fetch_html(url, session, cache)
+        if store:
+            store.save(url, html)
+        return html
+    return fetch
+
+def store_fetcher(store: PageStore) -> Tuple[List[str], Callable[[str], bytes]]:
+    # Offline re-parse: the latest stored page of every property, no network involved
+    digests = {url: digest for digest, url in store.latest().values()}
+    return list(digests), lambda url: store.get(digests[url])
+
+def _report_failure(url: str, e: Exception, kind: str = "request_failed") -> None:
+    print(json.dumps({"link": url, "error": f"{kind}: {e}"}, ensure_ascii=False), file=sys.stderr)
+
+def _init_parse_worker(fast_json: bool) -> None:
+    set_fast_json(fast_json)
+    init_romanizer()
+
+def make_parse_pool(workers: int) -> Executor:
+    if workers > 0:
+        # Never fork: by the first submit the fetch threads have requests in flight, and a forked child can
+        # inherit their locks held. Everything sent to the pool pickles, and the initializer restores the rest.
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"),
+                                   initializer=_init_parse_worker, initargs=(_fast_json,))
+    return ThreadPoolExecutor(max_workers=1)
+
+async def crawl_async(urls: Iterable[str], fetch: Callable[[str], bytes], parse: Callable[[str, bytes], dict],
+                      on_record, concurrency: int = 8, per_host: int = 4, workers: int = 0,
+                      on_failure: Optional[Callable[[str], None]] = None) -> int:
+    """Fetch with at most `concurrency` requests in flight (`per_host` per host), parse off-loop.
+
+    Parsing is decoupled from fetching: fetched bytes are handed to `parse` on the parse pool
+    (processes when `workers` > 0, so it must be picklable) and records reach `on_record` in
+    completion order.
+    """
+    loop = asyncio.get_running_loop()
+    url_iter = iter(urls)
+    url_done = object()
+    host_limits: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host))
+    # Bound the pages waiting on the parse stage so fast fetches cannot pile up in memory
+    parse_slots = asyncio.Semaphore(max(workers, 1) * 4)
+    parsing = set()
+    sink_errors: List[BaseException] = []
+    failed = 0
+
+    def parse_done(task: asyncio.Task) -> None:
+        parsing.discard(task)
+        # on_record raising (a full disk, a closed sink) ends the run instead of vanishing with the task
+        if not task.cancelled() and task.exception() is not None:
+            sink_errors.append(task.exception())
+
+    def failure(url: str, e: Exception, kind: str) -> None:
+        nonlocal failed
+        failed += 1
+        _report_failure(url, e, kind)
+        if on_failure:
+            on_failure(url)
+
+    # fetch is blocking (requests / disk): it runs on a pool sized to the concurrency limit. So can
+    # the URL source (a lazy sitemap fetching its children, frontier claims): it is advanced on a
+    # thread of its own, one next() at a time
+    with (ThreadPoolExecutor(max_workers=1) as source_pool,
+          ThreadPoolExecutor(max_workers=concurrency) as fetch_pool,
+          make_parse_pool(workers) as parse_pool):
+
+        async def parse_one(url: str, html: bytes) -> None:
+            try:
+                record = await loop.run_in_executor(parse_pool, parse, url, html)
+            except Exception as e:
+                failure(url, e, "parse_failed")
+            else:
+                on_record(record)
+            finally:
+                parse_slots.release()
+
+        async def worker() -> None:
+            while not sink_errors:
+                url = await loop.run_in_executor(source_pool, next, url_iter, url_done)
+                if url is url_done:
+                    return
+                async with host_limits[urlparse(url).hostname or ""]:
+                    try:
+                        html = await loop.run_in_executor(fetch_pool, fetch, url)
+                    except (requests.RequestException, OSError, KeyError) as e:
+                        failure(url, e, "request_failed" if isinstance(e, requests.RequestException)
+                                else "read_failed")
+                        continue
+                await parse_slots.acquire()
+                task = asyncio.create_task(parse_one(url, html))
+                parsing.add(task)
+                task.add_done_callback(parse_done)
+
+        # A failing URL source stops the workers; let in-flight parses land before re-raising
+        results = await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))), return_exceptions=True)
+        await asyncio.gather(*list(parsing), return_exceptions=True)
+        if sink_errors:
+            raise sink_errors[0]
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+    return failed
+
+def run_batch(urls: Iterable[str], fetch: Callable[[str], bytes], parse: Callable[[str, bytes], dict],
+              out_path: str = "out.json", concurrency: int = 8, per_host: int = 4, workers: int = 0,
+              frontier: Optional[Frontier] = None, claim_batch: int = 100, resume: bool = False,
+              checkpoint_every: int = 500, fmt: Optional[str] = None, part_rows: int = 0,
+              columns: Optional[Tuple[str, ...]] = None,
+              listing: Optional[Dict[str, ListingEntry]] = None) -> int:
+    ckpt = Checkpoint(out_path + ".ckpt", resume)
+    writer = open_sink(out_path, fmt, ckpt.offset, ckpt.count, part_rows, columns)
+    on_failure = None
+    if frontier:
+        # Work the shared queue instead of `urls`; rows are marked done only once their record is
+        # committed, and committing once per claim batch keeps that well inside the lease
+        urls = frontier.iter_claims(claim_batch)
+        checkpoint_every = min(checkpoint_every, claim_batch)
+
+        def on_failure(url: str) -> None:
+            frontier.fail(extract_property_csv_id(url))
+    if ckpt.done:
+        print(f"Resuming {out_path}: skipping {len(ckpt.done)} completed properties", file=sys.stderr)
+
+        def pending(url: str) -> bool:
+            csv_id = extract_property_csv_id(url)
+            if csv_id not in ckpt.done:
+                return True
+            if frontier:
+                # Claimed but already in the output: finish the row instead of leaving it leased
+                frontier.ack(csv_id)
+            return False
+        urls = filter(pending, urls)
+
+    def on_record(record: dict) -> None:
+        if listing:
+            entry = listing.get(record["property_csv_id"])
+            if entry:
+                record = fill_from_listing(record, entry)
+        writer.write(record)
+        if frontier:
+            frontier.ack(record["property_csv_id"])
+        if ckpt.add(record["property_csv_id"]) >= checkpoint_every:
+            ckpt.commit(writer.checkpoint(), writer.count)
+            if frontier and getattr(writer, "durable_checkpoints", True):
+                frontier.flush()
+    try:
+        failed = asyncio.run(crawl_async(urls, fetch, parse, on_record, concurrency, per_host, workers, on_failure))
+    finally:
+        ckpt.commit(writer.checkpoint(), writer.count)
+        ckpt.close()
+        writer.close()
+        if frontier:
+            frontier.flush()
+    print(f"Wrote {writer.count} records to {out_path} ({failed} failed)", file=sys.stderr)
+    if frontier:
+        print(f"Frontier: {frontier.counts()}", file=sys.stderr)
+    return failed
+
+def check_parity(store: PageStore, backends: List[str]) -> int:
+    """Parse every stored page with each backend; report records that differ from the first backend's."""
+    pages = mismatched = 0
+    for digest, url in store.latest().values():
+        html = store.get(digest)
+        ref = parse_property(url, html, backends[0])
+        ref_json = json.dumps(ref, ensure_ascii=False, default=json_default)
+        pages += 1
+        for backend in backends[1:]:
+            other = parse_property(url, html, backend)
+            if json.dumps(other, ensure_ascii=False, default=json_default) == ref_json:
+                continue
+            mismatched += 1
+            diff = {k: [ref.get(k), other.get(k)] for k in ref if ref.get(k) != other.get(k)}
+            print(json.dumps({"link": url, "backend": backend, "diff": diff or "key order"}, ensure_ascii=False),
+                  file=sys.stderr)
+    print(f"Parity: {pages} pages, {mismatched} mismatches ({' vs '.join(backends)})", file=sys.stderr)
+    return mismatched
+
+def bench_parse(store: PageStore, backends: List[str], repeat: int = 5,
+                fields: Optional[Tuple[str, ...]] = None) -> None:
+    """Time parse_property over every stored page; best of `repeat` passes per backend."""
+    pages = [(url, store.get(digest)) for digest, url in store.latest().values()]
+    if not pages:
+        print("bench: the page store is empty", file=sys.stderr)
+        return
+    init_romanizer()
+    for backend in backends:
+        best = float("inf")
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            for url, html in pages:
+                parse_property(url, html, backend, fields=fields)
+            best = min(best, time.perf_counter() - start)
+        print(f"{backend:12s} {best / len(pages) * 1000:8.3f} ms/page  ({len(pages)} pages)")
+
+def report_fetch_stats(session: requests.Session, cache: Optional[HttpCache] = None) -> None:
+    stats = connection_stats(session)
+    print(f"Connections: {stats['connections']} opened, {stats['reused']} reused "
+          f"over {stats['requests']} requests", file=sys.stderr)
+    if cache:
+        print(f"HTTP cache: {cache.revalidated} not modified, {cache.downloaded} downloaded", file=sys.stderr)
+
+# ==============================
+# 8) CLI
+# ==============================
+def build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Crawl rent.tokyu-housing-lease.co.jp property pages.")
+    p.add_argument("url", nargs="?", help="property listing URL")
+    p.add_argument("--url", dest="url_opt", help="property listing URL")
+    p.add_argument("--urls-file", help="batch mode: file with one URL per line ('-' for stdin)")
+    p.add_argument("--listing-url", action="append", metavar="URL",
+                   help="batch mode: crawl every property linked from this search-result page and its pagination")
+    p.add_argument("--max-pages", type=int, default=50, help="listing pages to follow per --listing-url")
+    p.add_argument("--sitemap", action="append", metavar="URL",
+                   help="batch mode: crawl the property URLs of a sitemap or sitemap index (.xml or .xml.gz)")
+    p.add_argument("--since", metavar="DATE", help="with --sitemap: skip entries whose lastmod is older than DATE")
+    p.add_argument("--harvest-only", action="store_true",
+                   help="with --listing-url/--sitemap: print the discovered URLs as JSON lines, no crawl")
+    p.add_argument("--frontier", metavar="DB",
+                   help="batch mode: queue URLs in a persistent SQLite frontier shared by crawler processes; "
+                        "seeds it from --urls-file/--listing-url/--sitemap, then works it until empty")
+    p.add_argument("--claim-batch", type=int, default=50, help="with --frontier: URLs leased per claim")
+    p.add_argument("--lease", type=float, default=300,
+                   help="with --frontier: seconds before a claimed but unfinished URL is handed out again")
+    p.add_argument("--out", metavar="PATH", default="out.json", help="batch mode output file (default: out.json)")
+    p.add_argument("--format", choices=sorted(SINKS),
+                   help="batch mode output format (default: from the --out extension, .ndjson/.jsonl = ndjson, "
+                        ".csv/.csv.gz = csv, .db/.sqlite = sqlite, .parquet = parquet, "
+                        ".arrow/.feather = arrow, else a JSON array)")
+    p.add_argument("--part-rows", type=int, default=0, metavar="N",
+                   help="with CSV output: split into <stem>-00000.csv, <stem>-00001.csv, ... of N rows each")
+    p.add_argument("--stdlib-json", action="store_true",
+                   help="use the json module even when orjson is installed (output is the same)")
+    p.add_argument("--resume", action="store_true",
+                   help="batch mode: continue an interrupted run from <out>.ckpt, skipping completed properties "
+                        "and appending to the existing output")
+    p.add_argument("--pool-size", type=int, default=10, help="HTTP keep-alive pool size (batch mode)")
+    p.add_argument("--concurrency", type=int, default=8, help="max requests in flight (batch mode)")
+    p.add_argument("--per-host", type=int, default=4, help="max requests in flight per host (batch mode)")
+    p.add_argument("--workers", type=int, default=0,
+                   help="parse in N worker processes (batch mode; 0 = one thread in-process)")
+    p.add_argument("--http-cache", metavar="DIR", help="conditional-GET cache directory (ETag/Last-Modified)")
+    p.add_argument("--store", metavar="DIR", default="pages",
+                   help="content-addressed page store (default: pages)")
+    p.add_argument("--from-store", action="store_true",
+                   help="batch mode: re-parse the latest stored page of every property instead of fetching")
+    p.add_argument("--parse-cache", metavar="DB",
+                   help="SQLite cache of extractor results keyed by page hash, URL and extractor version")
+    p.add_argument("--building-cache", action="store_true",
+                   help="batch mode: extract building-level fields once per building id, reuse them for its rooms")
+    p.add_argument("--selector-stats", metavar="DB",
+                   help="learn and persist per-host fallback selector hit rates (a scan hint; output is unchanged)")
+    p.add_argument("--fields", metavar="F1,F2,...",
+                   help="output only these fields (or the groups address, stations, images) and run only the "
+                        "extractors they need; property_csv_id is always included")
+    p.add_argument("--backend", choices=sorted(BACKENDS),
+                   help="HTML parser backend, default bs4 (lxml/selectolax skip BeautifulSoup; output is identical)")
+    p.add_argument("--bench", type=int, metavar="N",
+                   help="time parse_property over the page store (best of N passes, all backends unless --backend)")
+    p.add_argument("--check-parity", action="store_true",
+                   help="parse every stored page with all backends and report differing records")
+    return p
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python result.py <URL>")
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    if args.stdlib_json:
+        set_fast_json(False)
+    if args.resume and sink_format(args.out, args.format) in ("parquet", "arrow"):
+        parser.error("--resume is not supported for Parquet/Arrow output")
+    try:
+        fields = resolve_fields(tuple(f.strip() for f in args.fields.split(",") if f.strip())) if args.fields else None
+    except ValueError as e:
+        parser.error(str(e))
+    url = args.url_opt or args.url
+    cache = HttpCache(args.http_cache) if args.http_cache else None
+    store = PageStore(args.store)
+    parse_cache = ParseCache(args.parse_cache) if args.parse_cache else None
+    stats = SelectorStats(args.selector_stats) if args.selector_stats else None
+    buildings = BuildingCache() if args.building_cache else None
+    parse = partial(parse_property_cached, cache=parse_cache, backend=args.backend or "bs4", stats=stats,
+                    buildings=buildings, fields=fields)
+
+    if args.bench:
+        bench_parse(store, [args.backend] if args.backend else sorted(BACKENDS), args.bench, fields)
+        sys.exit(0)
+
+    if args.check_parity:
+        sys.exit(1 if check_parity(store, sorted(BACKENDS)) else 0)
+
+    if args.from_store:
+        urls, fetch = store_fetcher(store)
+        failed = run_batch(urls, fetch, parse, args.out, concurrency=args.concurrency, per_host=args.concurrency,
+                           workers=args.workers, resume=args.resume, fmt=args.format, part_rows=args.part_rows,
+                           columns=fields)
+        if stats:
+            stats.flush()
+        sys.exit(2 if failed else 0)
+
+    if args.urls_file or args.listing_url or args.sitemap or args.frontier:
+        session = build_session(max(args.pool_size, args.concurrency))
+        sources: List[Iterable] = []
+        listing: Dict[str, ListingEntry] = {}
+        for listing_url in args.listing_url or ():
+            entries = harvest_listing(listing_url, partial(fetch_html, session=session, cache=cache), args.max_pages)
+            listing.update((entry.property_csv_id, entry) for entry in entries)
+            sources.append(entries)
+        for sitemap in args.sitemap or ():
+            sources.append(iter_sitemap(sitemap, session, args.since))
+        if args.harvest_only:
+            for entry in chain.from_iterable(sources):
+                print(json.dumps(entry._asdict(), ensure_ascii=False))
+            sys.exit(0)
+        # Sitemaps stay lazy: the crawl pulls URLs as it goes, whatever the sitemap size
+        # Read once: with --urls-file - a second read would find stdin already consumed
+        listed = read_urls(args.urls_file) if args.urls_file else []
+        urls = chain(listed, (entry.url for entry in chain.from_iterable(sources)))
+        frontier = None
+        if args.frontier:
+            frontier = Frontier(args.frontier, lease_seconds=args.lease)
+            entries = chain(((u, None) for u in listed),
+                            ((entry.url, getattr(entry, "lastmod", None)) for entry in chain.from_iterable(sources)))
+            print(f"Frontier: seeded {frontier.add(entries)} URLs", file=sys.stderr)
+        failed = run_batch(urls, make_fetcher(session, cache, store), parse, args.out,
+                           concurrency=args.concurrency, per_host=args.per_host, workers=args.workers,
+                           frontier=frontier, claim_batch=args.claim_batch, resume=args.resume, fmt=args.format,
+                           part_rows=args.part_rows, columns=fields, listing=listing)
+        report_fetch_stats(session, cache)
+        if stats:
+            stats.flush()
+        sys.exit(2 if failed else 0)
+
+    if not url:
+        print("Usage: python result.py --url <URL>  |  python result.py --urls-file <FILE|->  |  "
+              "python result.py --from-store")
         print("Example:\n  python result.py https://rent.tokyu-housing-lease.co.jp/rent/8034884/117024")
         sys.exit(1)
 
-    url = sys.argv[1]
     try:
-        html = fetch_html(url)
+        html = fetch_html(url, cache=cache)
     except requests.RequestException as e:
         print(json.dumps({"error": f"request_failed: {e}"}, ensure_ascii=False))
         sys.exit(2)
 
-    data = parse_property(url, html)
+    data = parse(url, html)
+    digest = store.save(url, html)
+    if stats:
+        stats.flush()
 
     # In ra JSON + lưu file để xem Unicode chuẩn
-    print(json.dumps(data, ensure_ascii=False, indent=2))
-    with open("out.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    with open("page.html", "wb") as f:
-        f.write(html)
-    print("Wrote out.json & page.html")
+    body = json_dumps(data, indent=True)
+    print(body.decode("utf-8"))
+    with open("out.json", "wb") as f:
+        f.write(body)
+    print(f"Wrote out.json & {args.store} ({digest})")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,102 @@
+import multiprocessing
+import os
+import sqlite3
+
+from result import Checkpoint, Frontier, parse_property, run_batch
+
+PAGE = b"<html><head><title>x</title></head><body></body></html>"
+
+def _url(i: int) -> str:
+    return f"https://example.com/rent/1/{i}"
+
+def _rows(frontier: Frontier) -> dict:
+    with sqlite3.connect(frontier.path) as db:
+        return {row[0]: row[1:] for row in db.execute("SELECT property_csv_id, state, attempts FROM frontier")}
+
+def _other(frontier: Frontier, **kwargs) -> Frontier:
+    # A second crawler process on the same queue
+    other = Frontier(frontier.path, **kwargs)
+    other.owner = "elsewhere:1"
+    return other
+
+def test_claims_are_exclusive_until_the_lease_expires(tmp_path):
+    frontier = Frontier(str(tmp_path / "f.db"))
+    frontier.add((_url(i), None) for i in range(5))
+    assert len(frontier.claim(3)) == 3
+    assert len(_other(frontier).claim(10)) == 2
+
+    expired = Frontier(str(tmp_path / "g.db"), lease_seconds=-1)
+    expired.add([(_url(1), None)])
+    assert expired.claim(1) == [("1_1", _url(1))]
+    assert _other(expired, lease_seconds=-1).claim(1) == [("1_1", _url(1))]
+    assert _rows(expired)["1_1"] == ("leased", 2)
+
+def test_expired_leases_are_parked_after_max_attempts(tmp_path):
+    frontier = Frontier(str(tmp_path / "f.db"), lease_seconds=-1, max_attempts=2)
+    frontier.add([(_url(1), None)])
+    assert len(frontier.claim(1)) == 1
+    assert len(frontier.claim(1)) == 1
+    assert frontier.claim(1) == []
+    assert _rows(frontier)["1_1"] == ("failed", 2)
+
+def test_fail_requeues_until_max_attempts(tmp_path):
+    frontier = Frontier(str(tmp_path / "f.db"), max_attempts=2)
+    frontier.add([(_url(1), None)])
+    frontier.claim(1)
+    frontier.fail("1_1")
+    assert _rows(frontier)["1_1"] == ("pending", 1)
+    frontier.claim(1)
+    frontier.fail("1_1")
+    assert _rows(frontier)["1_1"] == ("failed", 2)
+
+def test_acks_land_only_on_flush_and_only_for_own_leases(tmp_path):
+    frontier = Frontier(str(tmp_path / "f.db"), lease_seconds=-1)
+    frontier.add([(_url(1), None), (_url(2), None)])
+    frontier.claim(2)
+    frontier.ack("1_1")
+    frontier.ack("1_2")
+    assert frontier.counts() == {"leased": 2}
+    _other(frontier).claim(1)  # took over one of the expired leases
+    frontier.flush()
+    assert frontier.counts() == {"done": 1, "leased": 1}
+
+def test_reseeding_requeues_only_on_newer_lastmod(tmp_path):
+    frontier = Frontier(str(tmp_path / "f.db"))
+    frontier.add([(_url(1), "2026-01-01")])
+    frontier.claim(1)
+    frontier.ack("1_1")
+    frontier.flush()
+    for lastmod in ("2026-01-01", "2025-12-31", None):
+        frontier.add([(_url(1), lastmod)])
+        assert _rows(frontier)["1_1"] == ("done", 1)
+    frontier.add([(_url(1), "2026-02-01")])
+    assert _rows(frontier)["1_1"] == ("pending", 0)
+
+def test_add_skips_urls_without_an_id(tmp_path):
+    frontier = Frontier(str(tmp_path / "f.db"))
+    entries = [("https://example.com/about", None)] * 5 + [(_url(1), None)]
+    assert frontier.add(entries, batch=2) == 1
+    assert list(_rows(frontier)) == ["1_1"]
+
+def _crash(out: str, db: str) -> None:
+    parsed = 0
+
+    def parse(url: str, html: bytes):
+        nonlocal parsed
+        parsed += 1
+        if parsed == 8:
+            os._exit(1)
+        return parse_property(url, html)
+    run_batch([], lambda url: PAGE, parse, out, concurrency=1, frontier=Frontier(db), claim_batch=3)
+
+def test_rows_are_done_only_once_their_records_are_checkpointed(tmp_path):
+    db, out = str(tmp_path / "f.db"), str(tmp_path / "out.ndjson")
+    Frontier(db).add((_url(i), None) for i in range(12))
+    child = multiprocessing.get_context("fork").Process(target=_crash, args=(out, db))
+    child.start()
+    child.join()
+    assert child.exitcode == 1
+    ckpt = Checkpoint(out + ".ckpt", resume=True)
+    ckpt.close()
+    done = {csv_id for csv_id, (state, _) in _rows(Frontier(db)).items() if state == "done"}
+    assert done and done <= ckpt.done
@@ -0,0 +1,38 @@
+import os
+
+from result import HttpCache, fetch_html
+
+URL = "https://example.com/rent/1/2"
+
+class _Response:
+    def __init__(self, status_code: int, content: bytes = b"", headers: dict = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        pass
+
+class StubSession:
+    """Answers 304 to a matching If-None-Match, else 200 with an ETag."""
+
+    def __init__(self):
+        self.sent = []
+
+    def get(self, url: str, headers: dict, timeout: float) -> _Response:
+        self.sent.append(dict(headers))
+        if headers.get("If-None-Match") == '"v1"':
+            return _Response(304)
+        return _Response(200, b"<html>page</html>", {"ETag": '"v1"'})
+
+def test_304_without_body_refetches_once_and_recaches(tmp_path):
+    cache, session = HttpCache(str(tmp_path)), StubSession()
+    assert fetch_html(URL, session, cache) == b"<html>page</html>"
+    os.remove(cache._path(URL) + ".body")
+
+    assert fetch_html(URL, session, cache) == b"<html>page</html>"
+    assert [h.get("If-None-Match") for h in session.sent] == [None, '"v1"', None]
+
+    # The refetched body is cached again: the next run revalidates with one request
+    assert fetch_html(URL, session, cache) == b"<html>page</html>"
+    assert [h.get("If-None-Match") for h in session.sent[3:]] == ['"v1"']
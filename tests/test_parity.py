@@ -0,0 +1,36 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from result import BACKENDS, parse_property, json_default
+
+FIXTURES = Path(__file__).parent / "fixtures"
+URL = "https://rent.tokyu-housing-lease.co.jp/rent/8034884/117024"
+
+# What the bs4 reference must extract from each page, so every fixture exercises its code path
+EXPECTED = {
+    "sjis_declared.html": {"building_name_ja": "グランド目黒", "city": "目黒区", "station_name_2": "不動前駅"},
+    "utf8_undeclared.html": {"building_name_ja": "メゾン中野", "postcode": "164-0001", "walk_1": "6"},
+    "page_text_fallback.html": {"postcode": "154-0001", "chome_banchi": "池尻3-1-2",
+                                "building_name_ja": "コーポ世田谷"},
+    "nested_address.html": {"postcode": "108-0071", "year": "2020", "building_name_ja": "ヒルズ港南"},
+}
+
+def _record_json(name: str, backend: str) -> str:
+    record = parse_property(URL, (FIXTURES / name).read_bytes(), backend)
+    return json.dumps(record, ensure_ascii=False, default=json_default)
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_reference_values(name):
+    record = json.loads(_record_json(name, "bs4"))
+    assert {k: record[k] for k in EXPECTED[name]} == EXPECTED[name]
+
+@pytest.mark.parametrize("backend", sorted(set(BACKENDS) - {"bs4"}))
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_backend_matches_bs4(name, backend):
+    assert _record_json(name, backend) == _record_json(name, "bs4")
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_backend_implements_every_primitive(backend):
+    assert not getattr(BACKENDS[backend], "__abstractmethods__", None)
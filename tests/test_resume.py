@@ -0,0 +1,96 @@
+import csv
+import gzip
+import json
+import multiprocessing
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from result import Checkpoint, parse_property, run_batch
+
+PAGE = (Path(__file__).parent / "fixtures" / "utf8_undeclared.html").read_bytes()
+URLS = [f"https://example.com/rent/{i // 3 + 1}/{i + 100}" for i in range(20)]
+IDS = sorted(f"{i // 3 + 1}_{i + 100}" for i in range(20))
+
+def _fetch(url: str) -> bytes:
+    return PAGE
+
+def _run(out: str, resume: bool = False, crash_after: int = 0, part_rows: int = 0) -> None:
+    parsed = 0
+
+    def parse(url: str, html: bytes):
+        nonlocal parsed
+        parsed += 1
+        if parsed == crash_after:
+            os._exit(1)  # no finally, no close: what a kill -9 leaves behind
+        return parse_property(url, html)
+    run_batch(URLS, _fetch, parse, out, concurrency=2, resume=resume, checkpoint_every=3, part_rows=part_rows)
+
+def _crash(out: str, part_rows: int = 0) -> None:
+    child = multiprocessing.get_context("fork").Process(target=_run, args=(out, False, 11, part_rows))
+    child.start()
+    child.join()
+    assert child.exitcode == 1
+
+def _ids(out: Path) -> list:
+    name = out.name
+    if name.endswith(".json"):
+        return [r["property_csv_id"] for r in json.loads(out.read_text(encoding="utf-8"))]
+    if name.endswith(".ndjson"):
+        return [json.loads(line)["property_csv_id"] for line in out.read_text(encoding="utf-8").splitlines()]
+    if name.endswith(".db"):
+        with sqlite3.connect(out) as db:
+            return [row[0] for row in db.execute("SELECT property_csv_id FROM properties")]
+    if name.endswith(".gz"):
+        paths, opener = [out], gzip.open
+    elif out.exists():
+        paths, opener = [out], open
+    else:
+        paths, opener = sorted(out.parent.glob(out.stem + "-*.csv")), open
+    ids = []
+    for path in paths:
+        with opener(path, "rt", encoding="utf-8", newline="") as f:
+            ids.extend(row["property_csv_id"] for row in csv.DictReader(f))
+    return ids
+
+@pytest.mark.parametrize("name, part_rows", [
+    ("out.json", 0), ("out.ndjson", 0), ("out.csv", 0), ("out.csv.gz", 0), ("out.csv", 4), ("out.db", 0),
+])
+def test_crash_then_resume(tmp_path, name, part_rows):
+    out = tmp_path / name
+    _crash(str(out), part_rows)
+    ckpt = Checkpoint(str(out) + ".ckpt", resume=True)
+    ckpt.close()
+    assert 0 < len(ckpt.done) < len(IDS)  # the crash came after some checkpoints, before the last
+    _run(str(out), resume=True, part_rows=part_rows)
+    assert sorted(_ids(out)) == IDS
+    if part_rows:
+        assert [len(_ids(p)) for p in sorted(tmp_path.glob("out-*.csv"))] == [4, 4, 4, 4, 4]
+
+def test_checkpoint_drops_torn_block(tmp_path):
+    path = tmp_path / "out.ckpt"
+    path.write_bytes(b"1_1\n1_2\n@ 40 2\n1_3\n@ 60 3\n1_4\n1_5\n@ 9")
+    ckpt = Checkpoint(str(path), resume=True)
+    assert (ckpt.done, ckpt.offset, ckpt.count) == ({"1_1", "1_2", "1_3"}, 60, 3)
+    ckpt.add("1_6")
+    ckpt.commit(80, 4)
+    ckpt.close()
+    assert path.read_bytes() == b"1_1\n1_2\n@ 40 2\n1_3\n@ 60 3\n1_6\n@ 80 4\n"
+
+@pytest.mark.parametrize("name", ["out.json", "out.ndjson", "out.csv", "out.db"])
+def test_resume_without_output_fails(tmp_path, name):
+    out = tmp_path / name
+    (tmp_path / (name + ".ckpt")).write_bytes(b"1_100\n@ 4096 1\n")
+    with pytest.raises(ValueError, match="cannot resume"):
+        run_batch(URLS, _fetch, parse_property, str(out), resume=True)
+
+@pytest.mark.parametrize("name", ["out.json", "out.ndjson", "out.csv"])
+def test_resume_with_short_output_fails(tmp_path, name):
+    out = tmp_path / name
+    out.write_bytes(b"x" * 10)
+    (tmp_path / (name + ".ckpt")).write_bytes(b"1_100\n@ 4096 1\n")
+    with pytest.raises(ValueError, match="cannot resume"):
+        run_batch(URLS, _fetch, parse_property, str(out), resume=True)
+    assert out.read_bytes() == b"x" * 10
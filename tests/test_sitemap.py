@@ -0,0 +1,58 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from result import iter_sitemap
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+ROOT = "https://example.com/sitemap.xml"
+
+def _urlset(*ids: str) -> bytes:
+    urls = "".join(f"<url><loc>/rent/{i}</loc></url>" for i in ids)
+    return f"<urlset {NS}>{urls}</urlset>".encode()
+
+def _index(*children: str) -> bytes:
+    locs = "".join(f"<sitemap><loc>{c}</loc></sitemap>" for c in children)
+    return f"<sitemapindex {NS}>{locs}</sitemapindex>".encode()
+
+class _Response:
+    def __init__(self, body: bytes):
+        self.raw = io.BytesIO(body)
+
+    def raise_for_status(self) -> None:
+        pass
+
+class StubSession:
+    def __init__(self, pages: dict):
+        self.pages = pages
+
+    def get(self, url: str, **kwargs) -> _Response:
+        return _Response(self.pages[url])
+
+def _failures(capsys) -> dict:
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    return {line["link"]: line["error"].split(":")[0] for line in lines}
+
+@pytest.mark.parametrize("bad", [
+    b"<html>not a sitemap",
+    gzip.compress(_urlset("1/2", "1/3"))[:-12],
+    b"\x1f\x8b\x08\x00garbage",
+], ids=["not-xml", "truncated-gzip", "corrupt-gzip"])
+def test_broken_child_is_skipped(bad, capsys):
+    session = StubSession({
+        ROOT: _index("a.xml", "/b.xml.gz", "c.xml"),
+        "https://example.com/a.xml": _urlset("1/1"),
+        "https://example.com/b.xml.gz": bad,
+        "https://example.com/c.xml": _urlset("2/1"),
+    })
+    urls = [e.url for e in iter_sitemap(ROOT, session)]
+    assert urls[0] == "https://example.com/rent/1/1"
+    assert urls[-1] == "https://example.com/rent/2/1"
+    assert _failures(capsys) == {"https://example.com/b.xml.gz": "sitemap_failed"}
+
+def test_local_child_is_never_opened(capsys):
+    session = StubSession({ROOT: _index("file:///etc/passwd", "c.xml"), "https://example.com/c.xml": _urlset("2/1")})
+    assert [e.url for e in iter_sitemap(ROOT, session)] == ["https://example.com/rent/2/1"]
+    assert _failures(capsys) == {"file:///etc/passwd": "sitemap_skipped"}